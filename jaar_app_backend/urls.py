@@ -15,14 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path , include
+from django.urls import path , include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from main_app.media import serve_media
 
 
 urlpatterns = [
     path('admin/', admin.site.urls), 
     path('api/', include('main_app.urls')), 
+    # Uploaded media, in development and production alike (range requests, caching, ?w= thumbnails)
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ] 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)    
\ No newline at end of file
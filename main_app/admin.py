@@ -1,9 +1,189 @@
-from django.contrib import admin
-from django.contrib import admin
-from .models import NeighborProfile, Post, Event, Volunteer
+from collections import Counter
 
-admin.site.register(NeighborProfile)
-admin.site.register(Post)
-admin.site.register(Event)
-admin.site.register(Volunteer)
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import connections, models, transaction
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
 
+from .models import NeighborProfile, Post, Event, Volunteer, ArchivedPost, ArchivedEvent
+from .signals import refresh_volunteer_counts
+
+
+# ------------------ PAGINATION ------------------
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate instead of COUNT(*) for unfiltered changelists on
+    large PostgreSQL tables. Filtered or small lists still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            estimate = row[0] if row else -1
+            if estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000):
+                return estimate
+        return super().count
+
+
+# ------------------ BATCHED ACTIONS ------------------
+def _in_batches(queryset, handle_batch):
+    """Run handle_batch(pks) over the queryset, one transaction per ADMIN_BATCH_SIZE rows."""
+    batch_size = getattr(settings, 'ADMIN_BATCH_SIZE', 500)
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        with transaction.atomic():
+            handle_batch(pks[start:start + batch_size])
+    return len(pks)
+
+
+def _cascades(queryset):
+    """Yield (model, queryset) for every table a delete of `queryset` cascades into."""
+    for relation in queryset.model._meta.related_objects:
+        if relation.on_delete is not models.CASCADE:
+            continue
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': queryset.values('pk')}
+        )
+        yield relation.related_model, related
+        yield from _cascades(related)
+
+
+@admin.action(description="Delete selected (in batches)", permissions=['delete'])
+def delete_in_batches(modeladmin, request, queryset):
+    """
+    delete_selected for large tables: the confirmation page shows row counts per
+    table instead of every object, and the delete commits in ADMIN_BATCH_SIZE batches.
+    Related-model delete permissions are checked and deletions logged as usual.
+    """
+    opts = modeladmin.model._meta
+    admin_site = modeladmin.admin_site
+    model_count = Counter({opts.verbose_name_plural: queryset.count()})
+    perms_lacking = set()
+    for model, related in _cascades(queryset):
+        count = related.count()
+        if not count:
+            continue
+        model_count[model._meta.verbose_name_plural] += count
+        if admin_site.is_registered(model) and not admin_site.get_model_admin(model).has_delete_permission(request):
+            perms_lacking.add(model._meta.verbose_name_plural)
+
+    if request.POST.get('post') == 'yes' and not perms_lacking:
+        def delete_batch(pks):
+            batch = queryset.model.objects.filter(pk__in=pks)
+            modeladmin.log_deletions(request, batch)
+            batch.delete()
+
+        total = _in_batches(queryset, delete_batch)
+        modeladmin.message_user(request, f"Deleted {total} {opts.verbose_name_plural}.", messages.SUCCESS)
+        return None
+
+    context = {
+        **admin_site.each_context(request),
+        'title': "Are you sure?",
+        'objects_name': opts.verbose_name_plural,
+        'model_count': list(model_count.items()),
+        'perms_lacking': sorted(perms_lacking),
+        'opts': opts,
+        'media': modeladmin.media,
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'select_across': request.POST.get('select_across', '0'),
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+    }
+    request.current_app = admin_site.name
+    return TemplateResponse(request, 'admin/main_app/delete_in_batches_confirmation.html', context)
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """Defaults for changelists on large tables."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    actions = [delete_in_batches]
+
+    def get_actions(self, request):
+        # The built-in delete_selected lists every object (and every cascaded one) on its confirmation page
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+# ------------------ NEIGHBOR ------------------
+@admin.register(NeighborProfile)
+class NeighborProfileAdmin(ScalableModelAdmin):
+    list_display = ['user', 'postal_code', 'street', 'house_number', 'phone']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    # Exact/prefix lookups so the postal_code, username and phone indexes are used
+    search_fields = ['postal_code__exact', 'user__username__startswith', 'phone__exact']
+
+
+# ------------------ POST ------------------
+@admin.register(Post)
+class PostAdmin(ScalableModelAdmin):
+    list_display = ['title', 'created_by', 'created_at']
+    list_select_related = ['created_by__user']
+    autocomplete_fields = ['created_by']
+    search_fields = ['title__startswith']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+
+# ------------------ EVENT ------------------
+@admin.action(description="Recount volunteers for selected events")
+def recount_volunteers(modeladmin, request, queryset):
+    total = _in_batches(queryset, refresh_volunteer_counts)
+    modeladmin.message_user(request, f"Recounted volunteers for {total} events.", messages.SUCCESS)
+
+
+@admin.register(Event)
+class EventAdmin(ScalableModelAdmin):
+    list_display = ['title', 'date', 'location', 'created_by', 'volunteer_count']
+    list_select_related = ['created_by__user']
+    autocomplete_fields = ['created_by']
+    search_fields = ['title__startswith']
+    date_hierarchy = 'date'
+    ordering = ['-date']
+    actions = [delete_in_batches, recount_volunteers]
+
+
+# ------------------ VOLUNTEER ------------------
+@admin.register(Volunteer)
+class VolunteerAdmin(ScalableModelAdmin):
+    list_display = ['name', 'phone', 'joined_at']
+    # Search-as-you-type instead of rendering every Event in the M2M widget
+    autocomplete_fields = ['events']
+    search_fields = ['name__startswith', 'phone__exact']
+    date_hierarchy = 'joined_at'
+    ordering = ['-joined_at']
+
+
+# ------------------ ARCHIVE ------------------
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(ScalableModelAdmin):
+    list_display = ['title', 'created_by', 'created_at', 'archived_at']
+    list_select_related = ['created_by__user']
+    raw_id_fields = ['created_by']
+    search_fields = ['id__exact']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(ScalableModelAdmin):
+    list_display = ['title', 'date', 'location', 'created_by', 'volunteer_count', 'archived_at']
+    list_select_related = ['created_by__user']
+    raw_id_fields = ['created_by', 'volunteers']
+    search_fields = ['id__exact']
+    date_hierarchy = 'date'
+    ordering = ['-date']
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedEvent, ArchivedPost, Event, Post, Volunteer
+from .signals import archiving
+
+
+# ------------------ CUTOFFS ------------------
+def months_ago(now, months):
+    """The same day `months` calendar months before `now` (clamped to the 28th)."""
+    index = now.year * 12 + now.month - 1 - months
+    return now.replace(year=index // 12, month=index % 12 + 1, day=min(now.day, 28))
+
+
+def event_cutoff(now=None, days=None):
+    days = settings.ARCHIVE_EVENTS_AFTER_DAYS if days is None else days
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def post_cutoff(now=None, months=None):
+    months = settings.ARCHIVE_POSTS_AFTER_MONTHS if months is None else months
+    return months_ago(now or timezone.now(), months)
+
+
+# ------------------ ARCHIVING ------------------
+# Archived rows keep their original ids, which relies on the primary key sequence
+# never handing out an id again: PostgreSQL sequences don't, and Django creates
+# SQLite AutoFields with AUTOINCREMENT, which doesn't reuse deleted ids either.
+def archive_events(cutoff, batch_size=500):
+    """
+    Move events dated before `cutoff` into ArchivedEvent, with their volunteer
+    links, one transaction per batch. Returns the number of events moved.
+    """
+    Through = Volunteer.events.through
+    ArchivedThrough = ArchivedEvent.volunteers.through
+    moved = 0
+    while True:
+        with transaction.atomic():
+            events = list(
+                Event.objects.filter(date__lt=cutoff).order_by('pk')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not events:
+                return moved
+            ids = [event.pk for event in events]
+
+            ArchivedEvent.objects.bulk_create([
+                ArchivedEvent(
+                    id=event.pk, title=event.title, description=event.description, date=event.date,
+                    location=event.location, created_by_id=event.created_by_id, volunteer_count=event.volunteer_count,
+                )
+                for event in events
+            ])
+            ArchivedThrough.objects.bulk_create([
+                ArchivedThrough(archivedevent_id=event_id, volunteer_id=volunteer_id)
+                for volunteer_id, event_id in Through.objects.filter(event_id__in=ids).values_list('volunteer_id', 'event_id')
+            ])
+            with archiving():
+                Event.objects.filter(pk__in=ids).delete()
+        moved += len(ids)
+
+
+def archive_posts(cutoff, batch_size=500):
+    """Move posts created before `cutoff` into ArchivedPost, one transaction per batch."""
+    moved = 0
+    while True:
+        with transaction.atomic():
+            posts = list(
+                Post.objects.filter(created_at__lt=cutoff).order_by('pk')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not posts:
+                return moved
+            ids = [post.pk for post in posts]
+
+            ArchivedPost.objects.bulk_create([
+                ArchivedPost(
+                    id=post.pk, title=post.title, content=post.content, image=post.image,
+                    created_by_id=post.created_by_id, created_at=post.created_at,
+                )
+                for post in posts
+            ])
+            with archiving():
+                Post.objects.filter(pk__in=ids).delete()
+        moved += len(ids)
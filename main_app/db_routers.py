@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Set for the rest of the current request (or thread) once something has been
+# written, and at the start of a request whose user wrote recently.
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+# Set once the current request itself has written; unlike the pin, a request
+# that merely started inside the read-your-writes window never sets it.
+_wrote = ContextVar('wrote', default=False)
+
+
+def pin_to_primary():
+    _pinned_to_primary.set(True)
+    _wrote.set(True)
+
+
+def is_pinned_to_primary():
+    return _pinned_to_primary.get()
+
+
+def has_written():
+    return _wrote.get()
+
+
+def begin_pinning(pinned):
+    """Start a request's pinning scope; returns a token for end_pinning()."""
+    return _pinned_to_primary.set(pinned), _wrote.set(False)
+
+
+def end_pinning(token):
+    pinned_token, wrote_token = token
+    _wrote.reset(wrote_token)
+    _pinned_to_primary.reset(pinned_token)
+
+
+# ------------------ REPLICA HEALTH ------------------
+class ReplicaHealth:
+    """
+    Tracks which replicas are reachable and caught up.
+    Checks run lazily from the router, at most once per
+    REPLICA_HEALTH_CHECK_SECONDS per process; between checks the last result is reused.
+    Replica connections time out after REPLICA_CONNECT_TIMEOUT seconds (see settings),
+    so an unreachable replica delays only the request that runs the check.
+    """
+
+    POSTGRES_LAG_SQL = (
+        "SELECT CASE "
+        "WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )
+
+    def __init__(self):
+        self._healthy = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def healthy_replicas(self):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas:
+            return []
+        interval = getattr(settings, 'REPLICA_HEALTH_CHECK_SECONDS', 30)
+        if self._healthy is None or time.monotonic() - self._checked_at >= interval:
+            # Only one thread refreshes; the others keep using the previous result,
+            # or the primary while the very first check is still running
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.refresh(replicas)
+                finally:
+                    self._lock.release()
+        return self._healthy or []
+
+    def refresh(self, replicas=None):
+        if replicas is None:
+            replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+        healthy = []
+        for alias in replicas:
+            try:
+                lag = self.lag(alias)
+            except DatabaseError:
+                connections[alias].close()
+                continue
+            if lag <= max_lag:
+                healthy.append(alias)
+        self._healthy = healthy
+        self._checked_at = time.monotonic()
+        return healthy
+
+    def lag(self, alias):
+        """Replication lag in seconds (0 for backends that can't report it)."""
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(self.POSTGRES_LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+            cursor.execute("SELECT 1")
+            return 0.0
+
+
+replica_health = ReplicaHealth()
+
+
+# ------------------ ROUTER ------------------
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a healthy replica and writes to the primary (`default`).
+    Reads stay on the primary inside transactions, after a write in the same
+    request, and while the request's user is inside their read-your-writes window.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_pinned_to_primary() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        # Related lookups (and prefetches) from an object read off the primary stay there
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_health.healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
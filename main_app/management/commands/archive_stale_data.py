@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.archive import archive_events, archive_posts, event_cutoff, post_cutoff
+from main_app.models import Event, Post
+from main_app.serializers import EventSerializer, PostSerializer
+
+
+class Command(BaseCommand):
+    help = "Move past events and old posts out of the live tables into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event-days', type=int, help="Archive events dated more than this many days ago (default: ARCHIVE_EVENTS_AFTER_DAYS).")
+        parser.add_argument('--post-months', type=int, help="Archive posts older than this many months (default: ARCHIVE_POSTS_AFTER_MONTHS).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be archived.")
+        parser.add_argument('--benchmark', action='store_true', help="Time the live post/event list queries before and after archiving.")
+
+    def handle(self, *args, **options):
+        events_before = event_cutoff(days=options['event_days'])
+        posts_before = post_cutoff(months=options['post_months'])
+        stale_events = Event.objects.filter(date__lt=events_before).count()
+        stale_posts = Post.objects.filter(created_at__lt=posts_before).count()
+        self.stdout.write(
+            f"{stale_events} events dated before {events_before:%Y-%m-%d} and "
+            f"{stale_posts} posts created before {posts_before:%Y-%m-%d} are eligible."
+        )
+        if options['dry_run']:
+            return
+
+        before = self.benchmark() if options['benchmark'] else None
+        moved_events = archive_events(events_before, options['batch_size'])
+        moved_posts = archive_posts(posts_before, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved_events} events and {moved_posts} posts."))
+
+        if before is not None:
+            after = self.benchmark()
+            for name in before:
+                self.stdout.write(
+                    f"{name}: {before[name]['rows']} -> {after[name]['rows']} rows, "
+                    f"median {before[name]['ms']:.1f} ms -> {after[name]['ms']:.1f} ms"
+                )
+
+    def benchmark(self, runs=5):
+        """Median time to fetch and serialize the default (hot) list endpoints' data."""
+        hot_paths = {
+            'posts list': (PostSerializer, Post.objects.order_by('-created_at')),
+            'events list': (EventSerializer, Event.objects.order_by('date')),
+        }
+        results = {}
+        for name, (serializer_class, queryset) in hot_paths.items():
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                data = serializer_class(serializer_class.prepare_queryset(queryset.all(), None), many=True).data
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {'rows': len(data), 'ms': statistics.median(timings)}
+        return results
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main_app.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Rebuild the neighborhood statistics rollups from the live and archive tables. Run periodically (e.g. nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postal-code', help="Only rebuild this postal code.")
+
+    def handle(self, *args, **options):
+        rows = reconcile(options['postal_code'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} neighborhood rollup rows."))
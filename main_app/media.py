@@ -0,0 +1,227 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+# ------------------ THUMBNAILS ------------------
+def _thumbnail_width(requested):
+    """Snap a ?w= value to the nearest configured width so the cache can't be flooded."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        return None
+    widths = sorted(getattr(settings, 'THUMBNAIL_WIDTHS', [160, 320, 640, 1280]))
+    if requested <= 0:
+        return None
+    for width in widths:
+        if width >= requested:
+            return width
+    return widths[-1]
+
+
+def _evict_thumbnails(root, max_bytes, keep):
+    """Delete least recently used thumbnails (never `keep`) until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    if total <= max_bytes:
+        return
+    for _, size, path in sorted(entries):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+def get_thumbnail(original_path, relative_path, width):
+    """
+    Return the path of a cached thumbnail of original_path at the given width,
+    generating it on first use. Cache hits refresh the file's mtime, which is the
+    LRU clock used for eviction. Returns original_path when it is already narrow
+    enough or can't be decoded; a marker file remembers that answer.
+    """
+    root = settings.THUMBNAIL_ROOT
+    os.makedirs(root, exist_ok=True)
+
+    stat = os.stat(original_path)
+    # The original's mtime is part of the key, so a replaced upload gets a new thumbnail
+    digest = hashlib.sha1(f"{relative_path}:{stat.st_mtime_ns}".encode()).hexdigest()
+    extension = os.path.splitext(relative_path)[1].lower() or '.jpg'
+    thumbnail_path = os.path.join(root, f"{digest}-w{width}{extension}")
+    original_marker = os.path.join(root, f"{digest}-w{width}.original")
+
+    for path in (thumbnail_path, original_marker):
+        if os.path.exists(path):
+            os.utime(path)
+            return original_path if path == original_marker else thumbnail_path
+
+    try:
+        with Image.open(original_path) as image:
+            # EXIF orientations 5-8 turn the image on its side, so it is displayed `height` wide
+            rotated = image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8)
+            if (image.height if rotated else image.width) <= width:
+                thumbnail = None
+            else:
+                thumbnail = ImageOps.exif_transpose(image)
+                thumbnail.thumbnail((width, thumbnail.height * width // thumbnail.width + 1))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        # SVGs, truncated uploads and decompression bombs are served as they are
+        thumbnail = None
+    if thumbnail is None:
+        with open(original_marker, 'w'):
+            pass
+        return original_path
+
+    image_format = Image.registered_extensions().get(extension, 'JPEG')
+    if image_format == 'JPEG' and thumbnail.mode not in ('RGB', 'L'):
+        thumbnail = thumbnail.convert('RGB')
+
+    # Write to a temp file first so concurrent requests never see a partial image
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            thumbnail.save(tmp, format=image_format, quality=85, optimize=True)
+        os.replace(tmp_path, thumbnail_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _evict_thumbnails(root, getattr(settings, 'THUMBNAIL_CACHE_MAX_BYTES', 512 * 1024 * 1024), keep=thumbnail_path)
+    return thumbnail_path
+
+
+# ------------------ RANGE REQUESTS ------------------
+def _parse_range(header, size):
+    """Return (start, end) for a single satisfiable byte range, 'invalid' if unsatisfiable, None to send everything."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# ------------------ MEDIA VIEW ------------------
+def _offload_response(path, relative_url, content_type):
+    """Hand the file to the front proxy (nginx X-Accel-Redirect or X-Sendfile)."""
+    response = HttpResponse(content_type=content_type)
+    # Header values must be ASCII; nginx and mod_xsendfile decode the percent-escapes
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(relative_url)
+    else:
+        response['X-Sendfile'] = quote(path)
+    return response
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file from MEDIA_ROOT with long-lived immutable caching,
+    conditional GETs and single byte-range requests. ?w=<width> serves a cached
+    thumbnail instead. With MEDIA_OFFLOAD set, the bytes are sent by the front proxy.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found.")
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    internal_url = settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+
+    width = _thumbnail_width(request.GET.get('w')) if 'w' in request.GET else None
+    if width and content_type.startswith('image/'):
+        thumbnail_path = get_thumbnail(full_path, path, width)
+        if thumbnail_path != full_path:
+            full_path = thumbnail_path
+            internal_url = settings.THUMBNAIL_ACCEL_REDIRECT_PREFIX + os.path.basename(thumbnail_path)
+
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    elif getattr(settings, 'MEDIA_OFFLOAD', None):
+        # The proxy handles Range itself
+        response = _offload_response(full_path, internal_url, content_type)
+    else:
+        response = _file_response(request, full_path, stat.st_size, content_type, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def _file_response(request, full_path, size, content_type, etag):
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.cache import patch_vary_headers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .db_routers import begin_pinning, end_pinning, has_written
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+# ------------------ READ YOUR WRITES ------------------
+class ReadYourWritesMiddleware:
+    """
+    Keeps a user's reads on the primary database for READ_YOUR_WRITES_SECONDS
+    after they wrote something, so replica lag never hides their own changes.
+    The user is identified from the JWT (signature check only, no query) or the session cookie.
+    """
+
+    UNSAFE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+    # Runs natively under both WSGI and ASGI, so async views avoid a thread hop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.jwt = JWTAuthentication()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.sticky_key(request)
+        token = begin_pinning(bool(key) and cache.get(key) is not None)
+        try:
+            response = self.get_response(request)
+            if key and self.wrote(request):
+                cache.set(key, 1, timeout=getattr(settings, 'READ_YOUR_WRITES_SECONDS', 10))
+        finally:
+            end_pinning(token)
+        return response
+
+    async def __acall__(self, request):
+        key = self.sticky_key(request)
+        token = begin_pinning(bool(key) and await cache.aget(key) is not None)
+        try:
+            response = await self.get_response(request)
+            if key and self.wrote(request):
+                await cache.aset(key, 1, timeout=getattr(settings, 'READ_YOUR_WRITES_SECONDS', 10))
+        finally:
+            end_pinning(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Views that only read despite an unsafe method (e.g. /api/batch/) set read_only = True
+        view_class = getattr(view_func, 'cls', view_func)
+        request.read_only_view = getattr(view_class, 'read_only', False)
+
+    def wrote(self, request):
+        # Reads inside the window don't renew it, or a polling client would never leave the primary
+        if has_written():
+            return True
+        return request.method in self.UNSAFE_METHODS and not getattr(request, 'read_only_view', False)
+
+    def sticky_key(self, request):
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header else None
+        if raw_token:
+            try:
+                validated = self.jwt.get_validated_token(raw_token)
+                return f"db-pin:user:{validated[jwt_settings.USER_ID_CLAIM]}"
+            except (InvalidToken, TokenError, KeyError):
+                return None
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session_key:
+            return f"db-pin:session:{hashlib.sha256(session_key.encode()).hexdigest()}"
+        return None
+
+
+# ------------------ COMPRESSION ------------------
+class CompressionMiddleware:
+    """
+    Compresses text and JSON responses with brotli (when installed) or gzip,
+    as negotiated through Accept-Encoding.
+    Bodies smaller than COMPRESSION_MIN_SIZE are left alone, streaming bodies are
+    compressed chunk by chunk, and compressed bodies are cached by content hash so
+    the same feed is not recompressed for every client.
+    """
+
+    COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+    ACCEPT_ENCODING_RE = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.IGNORECASE)
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        compressed = None if response.streaming else self.compressed_body(response.content, encoding)
+        return self.compress_response(response, encoding, compressed)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        compressed = None if response.streaming else await self.acompressed_body(response.content, encoding)
+        return self.compress_response(response, encoding, compressed)
+
+    def encoding_for(self, request, response):
+        """The negotiated encoding, or None when the response should be left alone."""
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return None
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        # Event streams must reach the client unbuffered
+        if content_type == 'text/event-stream' or not content_type.startswith(self.COMPRESSIBLE_TYPES):
+            return None
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return None
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 512):
+            return None
+        return self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    def compress_response(self, response, encoding, compressed):
+        """Swap in the compressed body (or stream) and set the headers."""
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = self.compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # An ETag describes the uncompressed body; mark it weak so it stays valid
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def negotiate(self, accept_encoding):
+        """Pick 'br' or 'gzip' from an Accept-Encoding header, honouring q=0."""
+        accepted = {}
+        for part in accept_encoding.split(','):
+            match = self.ACCEPT_ENCODING_RE.match(part)
+            if not match:
+                continue
+            try:
+                quality = float(match.group(2)) if match.group(2) else 1.0
+            except ValueError:
+                continue
+            accepted[match.group(1).lower()] = quality
+
+        def allowed(coding):
+            return accepted.get(coding, accepted.get('*', 0)) > 0
+
+        if brotli is not None and allowed('br'):
+            return 'br'
+        if allowed('gzip'):
+            return 'gzip'
+        return None
+
+    def cache_key(self, content, encoding):
+        if len(content) > getattr(settings, 'COMPRESSION_CACHE_MAX_SIZE', 1024 * 1024):
+            return None
+        return f"compressed:{encoding}:{hashlib.sha256(content).hexdigest()}"
+
+    @property
+    def cache(self):
+        # A cache of its own, so compressed bodies can't evict read-your-writes keys
+        return caches[getattr(settings, 'COMPRESSION_CACHE_ALIAS', 'default')]
+
+    def compressed_body(self, content, encoding):
+        key = self.cache_key(content, encoding)
+        compressed = self.cache.get(key) if key else None
+        if compressed is None:
+            compressed = self.compress(content, encoding)
+            if key:
+                self.cache.set(key, compressed, timeout=getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300))
+        return compressed
+
+    async def acompressed_body(self, content, encoding):
+        key = self.cache_key(content, encoding)
+        compressed = await self.cache.aget(key) if key else None
+        if compressed is None:
+            compressed = self.compress(content, encoding)
+            if key:
+                await self.cache.aset(key, compressed, timeout=getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300))
+        return compressed
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        return gzip.compress(content, compresslevel=6, mtime=0)
+
+    def stream_compressor(self, encoding):
+        """Return (process, finish) callables that compress a stream chunk by chunk."""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+            return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+    def compress_stream(self, chunks, encoding):
+        process, finish = self.stream_compressor(encoding)
+        for chunk in chunks:
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+
+    async def compress_async_stream(self, chunks, encoding):
+        process, finish = self.stream_compressor(encoding)
+        async for chunk in chunks:
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
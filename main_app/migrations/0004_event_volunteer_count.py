@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_volunteer_counts(apps, schema_editor):
+    Event = apps.get_model('main_app', 'Event')
+    Through = apps.get_model('main_app', 'Volunteer').events.through
+    counts = (
+        Through.objects.filter(event_id=OuterRef('pk'))
+        .order_by().values('event_id').annotate(total=Count('*')).values('total')
+    )
+    Event.objects.update(volunteer_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0003_alter_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='volunteer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_volunteer_counts, migrations.RunPython.noop),
+    ]
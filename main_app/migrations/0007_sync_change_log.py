@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:46
+
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    """Log every existing row once, so a first sync from cursor 0 sees the full dataset."""
+    ChangeLog = apps.get_model('main_app', 'ChangeLog')
+    for resource, model_name in (('post', 'Post'), ('event', 'Event'), ('volunteer', 'Volunteer')):
+        model = apps.get_model('main_app', model_name)
+        ids = model.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=2000)
+        batch = []
+        for object_id in ids:
+            batch.append(ChangeLog(resource=resource, object_id=object_id, action='upsert'))
+            if len(batch) >= 2000:
+                ChangeLog.objects.bulk_create(batch)
+                batch = []
+        ChangeLog.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0006_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('post', 'Post'), ('event', 'Event'), ('volunteer', 'Volunteer')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='volunteer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0007_sync_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NeighborhoodStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('postal_code', models.CharField(max_length=5)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('posts', models.IntegerField(default=0)),
+                ('events', models.IntegerField(default=0)),
+                ('volunteer_signups', models.IntegerField(default=0)),
+                ('active_neighbors', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('postal_code', 'period', 'period_start'), name='unique_neighborhood_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NeighborActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('postal_code', models.CharField(max_length=5)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='main_app.neighborprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('postal_code', 'period', 'period_start', 'neighbor'), name='unique_neighbor_activity')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VolunteerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('postal_code', models.CharField(max_length=5)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('signups', models.IntegerField(default=0)),
+                ('volunteer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='main_app.volunteer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['postal_code', 'period', 'period_start', '-signups'], name='volunteer_stat_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('postal_code', 'period', 'period_start', 'volunteer'), name='unique_volunteer_stat')],
+            },
+        ),
+    ]
@@ -6,8 +6,8 @@ class NeighborProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     house_number = models.CharField(max_length=10)
     street = models.CharField(max_length=100)
-    postal_code = models.CharField(max_length=5, blank=True, null=True)
-    phone = models.CharField(max_length=15)
+    postal_code = models.CharField(max_length=5, blank=True, null=True, db_index=True)
+    phone = models.CharField(max_length=15, db_index=True)
     bio = models.TextField(blank=True, null=True)
 
     def __str__(self):
@@ -16,11 +16,12 @@ class NeighborProfile(models.Model):
 
 #  Post
 class Post(models.Model):
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     content = models.TextField()
     image = models.ImageField(upload_to='media/posts/', blank=True, null=True)
     created_by = models.ForeignKey(NeighborProfile, on_delete=models.CASCADE, related_name='posts')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -28,11 +29,14 @@ class Post(models.Model):
 
 # Event
 class Event(models.Model):
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     description = models.TextField()
-    date = models.DateTimeField()
+    date = models.DateTimeField(db_index=True)
     location = models.CharField(max_length=255)
     created_by = models.ForeignKey(NeighborProfile, on_delete=models.CASCADE, related_name='events')
+    # Maintained from Volunteer.events changes (see signals.py)
+    volunteer_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} ({self.date.date()})"
@@ -40,10 +44,142 @@ class Event(models.Model):
 
 # Volunteer
 class Volunteer(models.Model):
-    name = models.CharField(max_length=100)
-    phone = models.CharField(max_length=15)
+    name = models.CharField(max_length=100, db_index=True)
+    phone = models.CharField(max_length=15, db_index=True)
     events = models.ManyToManyField(Event, related_name='volunteers')
-    joined_at = models.DateTimeField(auto_now_add=True)
+    joined_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
+
+
+# Archived Post
+class ArchivedPost(models.Model):
+    """A Post moved out of the live table once it is older than ARCHIVE_POSTS_AFTER_MONTHS. Keeps its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    content = models.TextField()
+    image = models.ImageField(upload_to='media/posts/', blank=True, null=True)
+    created_by = models.ForeignKey(NeighborProfile, on_delete=models.CASCADE, related_name='archived_posts')
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+
+# Archived Event
+class ArchivedEvent(models.Model):
+    """An Event moved out of the live table once it is older than ARCHIVE_EVENTS_AFTER_DAYS. Keeps its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    date = models.DateTimeField(db_index=True)
+    location = models.CharField(max_length=255)
+    created_by = models.ForeignKey(NeighborProfile, on_delete=models.CASCADE, related_name='archived_events')
+    volunteer_count = models.PositiveIntegerField(default=0, editable=False)
+    volunteers = models.ManyToManyField(Volunteer, related_name='archived_events', blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.date.date()})"
+
+
+# Change log
+class CurrentTransactionId(models.Func):
+    """The writing transaction's id on PostgreSQL; NULL on backends without transaction ids."""
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return 'NULL', []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only log of created/updated/deleted posts, events and volunteers.
+    On PostgreSQL, clients page through it by (txid, id): every transaction below
+    the current snapshot's xmin has finished, so entries can never appear behind
+    a cursor. Elsewhere the auto-increment id is the cursor.
+    """
+    POST = 'post'
+    EVENT = 'event'
+    VOLUNTEER = 'volunteer'
+    RESOURCE_CHOICES = [(POST, 'Post'), (EVENT, 'Event'), (VOLUNTEER, 'Volunteer')]
+    RESOURCES = {Post: POST, Event: EVENT, Volunteer: VOLUNTEER}
+
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [(UPSERT, 'Created or updated'), (DELETE, 'Deleted')]
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    txid = models.BigIntegerField(null=True, editable=False, db_default=CurrentTransactionId())
+
+    class Meta:
+        indexes = [models.Index(fields=['txid', 'id'], name='changelog_sync_idx')]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.resource} {self.object_id}"
+
+
+# Neighborhood statistics
+class NeighborhoodStat(models.Model):
+    """
+    Per-postal-code counters for one week or month. Kept up to date from model
+    signals (see stats.py) and rebuilt by the reconcile_stats command.
+    """
+    WEEK = 'week'
+    MONTH = 'month'
+    PERIOD_CHOICES = [(WEEK, 'Week'), (MONTH, 'Month')]
+
+    postal_code = models.CharField(max_length=5)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    posts = models.IntegerField(default=0)
+    events = models.IntegerField(default=0)
+    volunteer_signups = models.IntegerField(default=0)
+    active_neighbors = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['postal_code', 'period', 'period_start'], name='unique_neighborhood_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.postal_code} {self.period} {self.period_start}"
+
+
+class NeighborActivity(models.Model):
+    """A neighbor who posted or organized an event in a period; backs NeighborhoodStat.active_neighbors."""
+    postal_code = models.CharField(max_length=5)
+    period = models.CharField(max_length=5, choices=NeighborhoodStat.PERIOD_CHOICES)
+    period_start = models.DateField()
+    neighbor = models.ForeignKey(NeighborProfile, on_delete=models.CASCADE, related_name='activity')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['postal_code', 'period', 'period_start', 'neighbor'], name='unique_neighbor_activity'),
+        ]
+
+
+class VolunteerStat(models.Model):
+    """Sign-ups per volunteer for events in a postal code and period; feeds the top volunteers list."""
+    postal_code = models.CharField(max_length=5)
+    period = models.CharField(max_length=5, choices=NeighborhoodStat.PERIOD_CHOICES)
+    period_start = models.DateField()
+    volunteer = models.ForeignKey(Volunteer, on_delete=models.CASCADE, related_name='stats')
+    signups = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['postal_code', 'period', 'period_start', 'volunteer'], name='unique_volunteer_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['postal_code', 'period', 'period_start', '-signups'], name='volunteer_stat_top_idx'),
+        ]
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# ------------------ SUBSCRIPTION ------------------
+class Subscription:
+    """
+    A single client's view of a channel.
+    Messages are buffered in a bounded asyncio queue owned by the subscriber's
+    event loop; when a slow client falls behind, the oldest messages are dropped.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message):
+        """
+        Hand a message over to the subscriber's loop. Safe to call from any thread.
+        A subscription whose loop has already closed unsubscribes itself.
+        """
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            self.close()
+
+    def _put(self, message):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+# ------------------ BROKERS ------------------
+class BaseBroker:
+    """
+    Interface every broker implements.
+    `publish` is called from request threads (usually after a transaction commits),
+    `subscribe` from the async stream view.
+    """
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Fan-out inside a single process.
+    Good for tests and single-worker deployments; multi-worker setups should plug
+    in a broker backed by a shared transport through settings.REALTIME_BROKER.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'REALTIME_QUEUE_SIZE', 100)
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push(message)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by settings.REALTIME_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, 'REALTIME_BROKER', 'main_app.pubsub.InMemoryBroker')
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def reset_broker():
+    """Drop the current broker so the next call to get_broker() builds a fresh one (tests)."""
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def neighborhood_channel(postal_code):
+    return f"neighborhood:{postal_code}"
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .models import NeighborProfile
+from .pubsub import get_broker, neighborhood_channel
+
+
+# ------------------ DELTAS ------------------
+def post_delta(post, action):
+    """Small payload describing a created, updated or deleted post."""
+    delta = {"type": "post", "action": action, "id": post.pk}
+    if action != "deleted":
+        delta["data"] = {
+            "id": post.pk,
+            "title": post.title,
+            "created_by": post.created_by.user.username,
+            "created_at": post.created_at.isoformat() if post.created_at else None,
+        }
+    return delta
+
+
+def event_delta(event, action):
+    """Small payload describing a created, updated or deleted event."""
+    delta = {"type": "event", "action": action, "id": event.pk}
+    if action != "deleted":
+        delta["data"] = {
+            "id": event.pk,
+            "title": event.title,
+            "date": event.date.isoformat() if hasattr(event.date, "isoformat") else event.date,
+            "location": event.location,
+        }
+    return delta
+
+
+def volunteer_join_delta(volunteer, event_id):
+    return {
+        "type": "volunteer_join",
+        "action": "created",
+        "id": volunteer.pk,
+        "data": {"event": event_id, "volunteer": volunteer.pk, "name": volunteer.name},
+    }
+
+
+def publish_to_neighborhood(postal_code, delta):
+    if not postal_code:
+        return
+    get_broker().publish(neighborhood_channel(postal_code), delta)
+
+
+# ------------------ LIVE STREAM ------------------
+def _authenticate(request):
+    """
+    Resolve the JWT user for a stream request.
+    EventSource cannot send headers, so the access token may also come as ?token=.
+    Returns the user's NeighborProfile, or None when authentication fails.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return NeighborProfile.objects.filter(user=user).only('id', 'postal_code').first()
+
+
+def _format(message):
+    return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def _event_stream(channel):
+    # Subscribe from the loop that consumes the stream, and only once it is consumed
+    subscription = get_broker().subscribe(channel)
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 20)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing idle connections
+                yield ": keep-alive\n\n"
+                continue
+            yield _format(message)
+    finally:
+        subscription.close()
+
+
+async def neighborhood_stream(request):
+    """
+    Server-sent events stream of new or changed posts, events and volunteer joins
+    in the current user's postal code.
+    Each idle client costs one small queue on the event loop, not a worker thread.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would hold a worker thread and outlive the view's event loop
+        return JsonResponse({"error": "Live updates are only served over ASGI."}, status=501)
+
+    neighbor = await sync_to_async(_authenticate)(request)
+    if neighbor is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid."}, status=401)
+    if not neighbor.postal_code:
+        return JsonResponse({"error": "Add a postal code to your profile to receive live updates."}, status=400)
+
+    response = StreamingHttpResponse(
+        _event_stream(neighborhood_channel(neighbor.postal_code)), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
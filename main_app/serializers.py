@@ -1,8 +1,76 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import NeighborProfile, Post, Event, Volunteer
+from .models import NeighborProfile, Post, Event, Volunteer, ArchivedPost, ArchivedEvent, NeighborhoodStat
+
+
+# ------------------ FIELD SELECTION ------------------
+def param_set(request, name):
+    """Parse a comma-separated query param (?fields=a,b) into a set, or None if absent."""
+    if request is None:
+        return None
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and opt-in expansion for read requests.
+    ?fields=a,b keeps only those fields; ?expand=x adds a field listed in
+    Meta.expandable_fields, which are otherwise left out (views may also pass
+    context['expand']). prepare_queryset() shapes a queryset to match, using
+    Meta.field_querysets for the joins, prefetches and columns each field needs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(self.context.get('request'), self.context)
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def selected_fields(cls, request, context=None):
+        declared = list(cls.Meta.fields)
+        expandable = set(getattr(cls.Meta, 'expandable_fields', ()))
+        expand = set((context or {}).get('expand', ())) | (param_set(request, 'expand') or set())
+
+        requested = None
+        if request is not None and request.method in ('GET', 'HEAD'):
+            requested = param_set(request, 'fields')
+
+        if requested is None:
+            selected = set(declared) - expandable
+        else:
+            selected = requested - expandable
+        return (selected | (expand & expandable)) & set(declared)
+
+    @classmethod
+    def prepare_queryset(cls, queryset, request, context=None):
+        """Add only the select_related/prefetch_related/only() the selected fields need."""
+        selected = cls.selected_fields(request, context)
+        plans = getattr(cls.Meta, 'field_querysets', {})
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+
+        columns = ['pk']
+        for name in selected:
+            plan = plans.get(name, {})
+            if plan.get('select_related'):
+                queryset = queryset.select_related(*plan['select_related'])
+            if plan.get('prefetch_related'):
+                queryset = queryset.prefetch_related(*plan['prefetch_related'])
+            columns.extend(plan.get('only', ()))
+            if name in concrete:
+                columns.append(name)
+
+        # Only narrow the columns when the client trimmed the output
+        if request is not None and param_set(request, 'fields') is not None:
+            queryset = queryset.only(*columns)
+        return queryset
 
 # ------------------ NEIGHBOR ------------------
-class NeighborProfileSerializer(serializers.ModelSerializer):
+class NeighborProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Show the username of the user, read-only
     user = serializers.StringRelatedField(read_only=True)
 
@@ -10,23 +78,29 @@ class NeighborProfileSerializer(serializers.ModelSerializer):
         model = NeighborProfile
         fields = ['id', 'user', 'house_number', 'postal_code',  'street', 'phone', 'bio']
         read_only_fields = ['id', 'user']
+        field_querysets = {
+            'user': {'select_related': ['user'], 'only': ['user', 'user__username']},
+        }
 
 
 # ------------------ POST ------------------
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
     image = serializers.ImageField(required=False)   
 
     class Meta:
         model = Post
-        fields = ['id', 'created_by', 'title', 'image', 'content', 'created_at']
-        read_only_fields = ['id', 'created_by', 'created_at']
+        fields = ['id', 'created_by', 'title', 'image', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        field_querysets = {
+            'created_by': {'select_related': ['created_by__user'], 'only': ['created_by', 'created_by__user', 'created_by__user__username']},
+        }
 
     def to_representation(self, instance):
          
         ret = super().to_representation(instance)
         request = self.context.get('request')
-        if instance.image and request:
+        if 'image' in ret and instance.image and request:
             ret['image'] = request.build_absolute_uri(instance.image.url)
         return ret
 
@@ -37,7 +111,7 @@ class PostSerializer(serializers.ModelSerializer):
 
 # ------------------ VOLUNTEER ------------------
  
-class VolunteerSerializer(serializers.ModelSerializer):
+class VolunteerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     events = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Event.objects.all()
     )
@@ -45,8 +119,11 @@ class VolunteerSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Volunteer
-        fields = ['id', 'name', 'phone', 'events', 'total_events']
-        read_only_fields = ['id', 'total_events']
+        fields = ['id', 'name', 'phone', 'events', 'total_events', 'updated_at']
+        read_only_fields = ['id', 'total_events', 'updated_at']
+        field_querysets = {
+            'events': {'prefetch_related': [Prefetch('events', queryset=Event.objects.only('id'))]},
+        }
 
 
 # ------------------ EVENT ------------------
@@ -58,18 +135,46 @@ class EventNestedVolunteerSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'phone']
 
 
-class EventSerializer(serializers.ModelSerializer):
-    # Show creator username and nested volunteers
+class EventSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # Show creator username, the volunteer count and (on request) nested volunteers
     created_by = serializers.StringRelatedField(read_only=True)
     volunteers = EventNestedVolunteerSerializer(many=True, read_only=True)
 
     class Meta:
         model = Event
-        fields = ['id', 'title', 'description', 'date', 'location', 'created_by', 'volunteers']
-        read_only_fields = ['id', 'created_by', 'volunteers']
+        fields = ['id', 'title', 'description', 'date', 'location', 'created_by', 'volunteer_count', 'updated_at', 'volunteers']
+        read_only_fields = ['id', 'created_by', 'volunteer_count', 'updated_at', 'volunteers']
+        # The full roster is only embedded when expanded; use volunteer_count otherwise
+        expandable_fields = ['volunteers']
+        field_querysets = {
+            'created_by': {'select_related': ['created_by__user'], 'only': ['created_by', 'created_by__user', 'created_by__user__username']},
+            'volunteers': {'prefetch_related': [Prefetch('volunteers', queryset=Volunteer.objects.only('id', 'name', 'phone'))]},
+        }
 
     def create(self, validated_data):
         request = self.context.get('request')
-        neighbor = NeighborProfile.objects.get(user=request.user)
-        validated_data['created_by'] = neighbor
+        validated_data['created_by'] = request.user.neighborprofile
         return super().create(validated_data)
+
+
+# ------------------ ARCHIVE ------------------
+class ArchivedPostSerializer(PostSerializer):
+    class Meta(PostSerializer.Meta):
+        model = ArchivedPost
+        # Archived rows never change, so archived_at replaces updated_at
+        fields = [name for name in PostSerializer.Meta.fields if name != 'updated_at'] + ['archived_at']
+        read_only_fields = fields
+
+
+class ArchivedEventSerializer(EventSerializer):
+    class Meta(EventSerializer.Meta):
+        model = ArchivedEvent
+        fields = [name for name in EventSerializer.Meta.fields if name != 'updated_at'] + ['archived_at']
+        read_only_fields = fields
+
+
+# ------------------ STATS ------------------
+class NeighborhoodStatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NeighborhoodStat
+        fields = ['period_start', 'posts', 'events', 'volunteer_signups', 'active_neighbors']
@@ -0,0 +1,220 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ChangeLog, Event, Post, Volunteer
+from . import stats
+from .realtime import event_delta, post_delta, publish_to_neighborhood, volunteer_join_delta
+
+
+# Set while rows are moved between tables (e.g. archiving), which clients
+# should not see as deletions
+_archiving = ContextVar('archiving', default=False)
+
+
+@contextmanager
+def archiving():
+    """Suppress change notifications for deletes that only move rows to the archive."""
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def _publish_on_commit(postal_code, delta):
+    # A failing publish must not turn an already committed write into a 500
+    transaction.on_commit(lambda: publish_to_neighborhood(postal_code, delta), robust=True)
+
+
+# ------------------ LIVE UPDATES ------------------
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    action = "created" if created else "updated"
+    _publish_on_commit(instance.created_by.postal_code, post_delta(instance, action))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    _publish_on_commit(instance.created_by.postal_code, post_delta(instance, "deleted"))
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, **kwargs):
+    action = "created" if created else "updated"
+    _publish_on_commit(instance.created_by.postal_code, event_delta(instance, action))
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    _publish_on_commit(instance.created_by.postal_code, event_delta(instance, "deleted"))
+
+
+def publish_joins(instance, reverse, volunteer_ids, postal_codes):
+    """Publish a volunteer-joined delta per (volunteer, event) pair; called from volunteer_events_changed."""
+    if reverse:
+        # event.volunteers.add(...): instance is the Event
+        pairs = [(volunteer, instance.pk) for volunteer in Volunteer.objects.filter(pk__in=volunteer_ids)]
+    else:
+        # volunteer.events.add(...): instance is the Volunteer
+        pairs = [(instance, event_id) for event_id in postal_codes]
+    for volunteer, event_id in pairs:
+        _publish_on_commit(postal_codes.get(event_id), volunteer_join_delta(volunteer, event_id))
+
+
+# ------------------ CHANGE LOG ------------------
+def log_changes(resource, object_ids, action=ChangeLog.UPSERT):
+    """Append change-log entries (the /api/sync/ feed) for the given objects."""
+    if _archiving.get() or not object_ids:
+        return
+    ChangeLog.objects.bulk_create([
+        ChangeLog(resource=resource, object_id=object_id, action=action) for object_id in object_ids
+    ])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Volunteer)
+def log_saved(sender, instance, **kwargs):
+    log_changes(ChangeLog.RESOURCES[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Volunteer)
+def log_deleted(sender, instance, **kwargs):
+    # The delete entry is the tombstone clients reconcile against
+    log_changes(ChangeLog.RESOURCES[sender], [instance.pk], ChangeLog.DELETE)
+
+
+# ------------------ VOLUNTEER COUNTS ------------------
+def refresh_volunteer_counts(event_ids):
+    """Recount Event.volunteer_count for the given events straight from the M2M table."""
+    if not event_ids:
+        return
+    Through = Volunteer.events.through
+    counts = (
+        Through.objects.filter(event_id=OuterRef('pk'))
+        .order_by().values('event_id').annotate(total=Count('*')).values('total')
+    )
+    Event.objects.filter(pk__in=event_ids).update(
+        volunteer_count=Coalesce(Subquery(counts), 0), updated_at=timezone.now()
+    )
+    log_changes(ChangeLog.EVENT, event_ids)
+
+
+@receiver(m2m_changed, sender=Volunteer.events.through)
+def volunteer_events_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse: event.volunteers.add/remove/clear(), so instance is an Event
+    related = instance.volunteers if reverse else instance.events
+    if action in ("pre_clear", "pre_remove"):
+        # The rows are gone afterwards, so remember which ones actually existed
+        if action == "pre_remove":
+            related = related.filter(pk__in=pk_set)
+        instance._removed_ids = set(related.values_list('id', flat=True))
+        return
+    if action in ("post_clear", "post_remove"):
+        related_ids = instance.__dict__.pop('_removed_ids', set())
+    elif action == "post_add":
+        related_ids = pk_set or set()
+    else:
+        return
+    if not related_ids:
+        return
+
+    volunteer_ids, event_ids = (related_ids, [instance.pk]) if reverse else ([instance.pk], related_ids)
+    # Looked up once for the live updates and the stats
+    events = list(Event.objects.filter(pk__in=event_ids).values_list('id', 'date', 'created_by__postal_code'))
+    refresh_volunteer_counts(event_ids)
+    # A volunteer's event list is part of its representation too
+    Volunteer.objects.filter(pk__in=volunteer_ids).update(updated_at=timezone.now())
+    log_changes(ChangeLog.VOLUNTEER, volunteer_ids)
+    stats.record_signups(volunteer_ids, [(date, postal_code) for _, date, postal_code in events], 1 if action == "post_add" else -1)
+    if action == "post_add":
+        publish_joins(instance, reverse, volunteer_ids, {event_id: postal_code for event_id, _, postal_code in events})
+
+
+@receiver(pre_delete, sender=Volunteer)
+def volunteer_deleting(sender, instance, **kwargs):
+    # Deleting a volunteer removes its M2M rows without sending m2m_changed
+    instance._deleted_events = list(instance.events.values_list('id', 'date', 'created_by__postal_code'))
+
+
+@receiver(post_delete, sender=Volunteer)
+def volunteer_deleted(sender, instance, **kwargs):
+    events = getattr(instance, '_deleted_events', [])
+    refresh_volunteer_counts([event_id for event_id, _, _ in events])
+    # The volunteer's own VolunteerStat rows were deleted along with it
+    stats.record_signups([instance.pk], [(date, postal_code) for _, date, postal_code in events], -1, per_volunteer=False)
+
+
+# ------------------ NEIGHBORHOOD STATS ------------------
+@receiver(post_save, sender=Post)
+def post_stats(sender, instance, created, **kwargs):
+    if created:
+        postal_code = instance.created_by.postal_code
+        stats.bump(postal_code, instance.created_at, posts=1)
+        stats.mark_active(postal_code, instance.created_at, instance.created_by_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_stats(sender, instance, **kwargs):
+    # Archived posts still count towards their period
+    if not _archiving.get():
+        postal_code = instance.created_by.postal_code
+        stats.bump(postal_code, instance.created_at, posts=-1)
+        stats.unmark_active(postal_code, instance.created_at, instance.created_by_id)
+
+
+@receiver(pre_save, sender=Event)
+def event_saving_stats(sender, instance, raw=False, **kwargs):
+    # Remember the stored date so a rescheduled event can be moved between periods
+    if instance.pk and not raw:
+        instance._previous_date = Event.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=Event)
+def event_stats(sender, instance, created, **kwargs):
+    postal_code = instance.created_by.postal_code
+    if created:
+        stats.bump(postal_code, instance.date, events=1)
+        stats.mark_active(postal_code, instance.date, instance.created_by_id)
+        return
+
+    previous_date = instance.__dict__.pop('_previous_date', None)
+    if previous_date is None or stats.period_starts(previous_date) == stats.period_starts(instance.date):
+        return
+    volunteer_ids = list(instance.volunteers.values_list('id', flat=True))
+    stats.bump(postal_code, previous_date, events=-1, volunteer_signups=-len(volunteer_ids))
+    stats.bump_volunteers(postal_code, previous_date, volunteer_ids, -1)
+    stats.bump(postal_code, instance.date, events=1, volunteer_signups=len(volunteer_ids))
+    stats.bump_volunteers(postal_code, instance.date, volunteer_ids, 1)
+    stats.mark_active(postal_code, instance.date, instance.created_by_id)
+    stats.unmark_active(postal_code, previous_date, instance.created_by_id)
+
+
+@receiver(pre_delete, sender=Event)
+def event_deleting_stats(sender, instance, **kwargs):
+    if not _archiving.get():
+        instance._deleted_volunteer_ids = list(instance.volunteers.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted_stats(sender, instance, **kwargs):
+    if _archiving.get():
+        return
+    postal_code = instance.created_by.postal_code
+    volunteer_ids = getattr(instance, '_deleted_volunteer_ids', [])
+    stats.bump(postal_code, instance.date, events=-1, volunteer_signups=-len(volunteer_ids))
+    stats.bump_volunteers(postal_code, instance.date, volunteer_ids, -1)
+    stats.unmark_active(postal_code, instance.date, instance.created_by_id)
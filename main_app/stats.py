@@ -0,0 +1,251 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import connections, router, transaction
+from django.db.models import Count, DateField, F, Q
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    ArchivedEvent, ArchivedPost, Event, NeighborActivity, NeighborhoodStat, Post, Volunteer, VolunteerStat,
+)
+
+WEEK = NeighborhoodStat.WEEK
+MONTH = NeighborhoodStat.MONTH
+
+
+# ------------------ PERIODS ------------------
+def period_starts(moment):
+    """The week (starting Monday) and month containing `moment` (a datetime or date), as dates in the current time zone."""
+    if isinstance(moment, str):
+        moment = parse_datetime(moment)
+    if not isinstance(moment, datetime):
+        day = moment
+    else:
+        day = timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+    return {WEEK: day - timedelta(days=day.weekday()), MONTH: day.replace(day=1)}
+
+
+def recent_period_starts(period, count, until):
+    """The `count` consecutive week or month starts ending with the period containing `until`, newest first."""
+    start = period_starts(until)[period]
+    starts = []
+    for _ in range(count):
+        starts.append(start)
+        if period == WEEK:
+            start -= timedelta(days=7)
+        else:
+            start = (start - timedelta(days=1)).replace(day=1)
+    return starts
+
+
+def period_range(period, start):
+    """The [start, end) datetimes of a week or month period in the current time zone."""
+    end = start + timedelta(days=7) if period == WEEK else (start + timedelta(days=32)).replace(day=1)
+    return tuple(timezone.make_aware(datetime.combine(day, time.min)) for day in (start, end))
+
+
+# ------------------ INCREMENTAL UPDATES ------------------
+def _in_periods(starts):
+    """Q matching the rows of the given {period: period_start}."""
+    return reduce(or_, (Q(period=period, period_start=start) for period, start in starts.items()))
+
+
+def _bump_rows(model, postal_code, starts, volunteer_ids=None, **deltas):
+    """
+    Add deltas to the rows of the given {period: period_start} (per volunteer for
+    VolunteerStat). Missing rows are created at zero, skipping any a concurrent
+    request created first, and one UPDATE then adds the deltas: two queries
+    however many volunteers are involved.
+    """
+    keys = [dict(postal_code=postal_code, period=period, period_start=start) for period, start in starts.items()]
+    rows = model.objects.filter(_in_periods(starts), postal_code=postal_code)
+    if volunteer_ids is not None:
+        keys = [dict(key, volunteer_id=volunteer_id) for key in keys for volunteer_id in volunteer_ids]
+        rows = rows.filter(volunteer_id__in=volunteer_ids)
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    rows.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def bump(postal_code, moment, **deltas):
+    """Add deltas (posts=1, events=-1, ...) to the week and month rollups containing `moment`."""
+    if not postal_code or moment is None:
+        return
+    _bump_rows(NeighborhoodStat, postal_code, period_starts(moment), **deltas)
+
+
+def bump_volunteers(postal_code, moment, volunteer_ids, delta):
+    """Add `delta` sign-ups to each volunteer's VolunteerStat rows for `moment`."""
+    volunteer_ids = list(volunteer_ids)
+    if not postal_code or moment is None or not volunteer_ids:
+        return
+    _bump_rows(VolunteerStat, postal_code, period_starts(moment), volunteer_ids, signups=delta)
+
+
+def mark_active(postal_code, moment, neighbor_id):
+    """Count a neighbor once per period as active in their postal code."""
+    if not postal_code or moment is None:
+        return
+    starts = period_starts(moment)
+    seen = set(
+        NeighborActivity.objects.filter(_in_periods(starts), postal_code=postal_code, neighbor_id=neighbor_id)
+        .values_list('period', flat=True)
+    )
+    new = {}
+    for period, start in starts.items():
+        if period in seen:
+            continue
+        _, created = NeighborActivity.objects.get_or_create(
+            postal_code=postal_code, period=period, period_start=start, neighbor_id=neighbor_id,
+        )
+        if created:
+            new[period] = start
+    if new:
+        _bump_rows(NeighborhoodStat, postal_code, new, active_neighbors=1)
+
+
+def _has_activity(neighbor_id, period, start):
+    """Whether the neighbor posted or organized an event (live or archived) in the period."""
+    begin, end = period_range(period, start)
+    sources = ((Post, 'created_at'), (ArchivedPost, 'created_at'), (Event, 'date'), (ArchivedEvent, 'date'))
+    return any(
+        model.objects.filter(created_by_id=neighbor_id, **{f'{field}__gte': begin, f'{field}__lt': end}).exists()
+        for model, field in sources
+    )
+
+
+def unmark_active(postal_code, moment, neighbor_id):
+    """
+    Undo mark_active for the periods containing `moment` in which the neighbor no
+    longer has a post or event, after one was deleted or moved to another period.
+    """
+    if not postal_code or moment is None:
+        return
+    starts = period_starts(moment)
+    seen = NeighborActivity.objects.filter(_in_periods(starts), postal_code=postal_code, neighbor_id=neighbor_id)
+    gone = {
+        period: starts[period] for period in seen.values_list('period', flat=True)
+        if not _has_activity(neighbor_id, period, starts[period])
+    }
+    if gone:
+        NeighborActivity.objects.filter(_in_periods(gone), postal_code=postal_code, neighbor_id=neighbor_id).delete()
+        _bump_rows(NeighborhoodStat, postal_code, gone, active_neighbors=-1)
+
+
+def bump_signups(postal_code, moment, volunteer_ids, delta, per_volunteer=True):
+    """
+    Add `delta` sign-ups per volunteer to the rollups of an event's postal code and date.
+    per_volunteer=False skips VolunteerStat, for volunteers that are being deleted.
+    """
+    volunteer_ids = list(volunteer_ids)
+    if not volunteer_ids:
+        return
+    bump(postal_code, moment, volunteer_signups=delta * len(volunteer_ids))
+    if per_volunteer:
+        bump_volunteers(postal_code, moment, volunteer_ids, delta)
+
+
+def record_signups(volunteer_ids, events, delta, per_volunteer=True):
+    """Count every volunteer as a sign-up for each event, given as (date, postal_code) pairs."""
+    for date, postal_code in events:
+        bump_signups(postal_code, date, volunteer_ids, delta, per_volunteer)
+
+
+# ------------------ RECONCILIATION ------------------
+ROLLUP_MODELS = (NeighborhoodStat, NeighborActivity, VolunteerStat)
+
+
+def _lock_rollups():
+    """
+    On PostgreSQL, block incremental updates until the current transaction ends.
+    Writers already holding rollup rows finish first, so the aggregation that
+    follows sees their source rows; later writers bump the rebuilt rows instead.
+    """
+    connection = connections[router.db_for_write(NeighborhoodStat)]
+    if connection.vendor != 'postgresql':
+        return
+    tables = ', '.join(connection.ops.quote_name(model._meta.db_table) for model in ROLLUP_MODELS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE")
+
+
+def reconcile(postal_code=None):
+    """
+    Rebuild the rollups from the live and archive tables, for one postal code or all.
+    Incremental updates can drift (e.g. a neighbor changing postal code, or races
+    between a delete and a new post in the same period), and rows whose counters all
+    went back to zero are left in place; this drops them. Meant to run periodically.
+    Returns the number of NeighborhoodStat rows written.
+    """
+    with transaction.atomic():
+        _lock_rollups()
+        return _rebuild(postal_code)
+
+
+def _rebuild(postal_code):
+    """Aggregate the source tables and replace the rollups; runs inside reconcile()'s transaction."""
+    counters = defaultdict(lambda: defaultdict(int))
+    activity = set()
+    volunteer_signups = defaultdict(int)
+
+    def scoped(queryset, path):
+        if postal_code:
+            return queryset.filter(**{path: postal_code})
+        return queryset.exclude(**{f'{path}__isnull': True}).exclude(**{path: ''})
+
+    for period, trunc in ((WEEK, TruncWeek), (MONTH, TruncMonth)):
+        sources = (
+            (Post, 'created_at', 'posts'), (ArchivedPost, 'created_at', 'posts'),
+            (Event, 'date', 'events'), (ArchivedEvent, 'date', 'events'),
+        )
+        for model, date_field, counter in sources:
+            rows = (
+                scoped(model.objects.all(), 'created_by__postal_code')
+                .annotate(start=trunc(date_field, output_field=DateField()))
+                .values('created_by__postal_code', 'start', 'created_by_id')
+                .annotate(total=Count('id')).order_by()
+            )
+            for row in rows:
+                key = (row['created_by__postal_code'], period, row['start'])
+                counters[key][counter] += row['total']
+                activity.add(key + (row['created_by_id'],))
+
+        links = ((Volunteer.events.through, 'event'), (ArchivedEvent.volunteers.through, 'archivedevent'))
+        for through, event_field in links:
+            postal_path = f'{event_field}__created_by__postal_code'
+            rows = (
+                scoped(through.objects.all(), postal_path)
+                .annotate(start=trunc(f'{event_field}__date', output_field=DateField()))
+                .values(postal_path, 'start', 'volunteer_id')
+                .annotate(total=Count('id')).order_by()
+            )
+            for row in rows:
+                key = (row[postal_path], period, row['start'])
+                counters[key]['volunteer_signups'] += row['total']
+                volunteer_signups[key + (row['volunteer_id'],)] += row['total']
+
+    for postal, period, start, _ in activity:
+        counters[(postal, period, start)]['active_neighbors'] += 1
+
+    for model in ROLLUP_MODELS:
+        existing = model.objects.all()
+        if postal_code:
+            existing = existing.filter(postal_code=postal_code)
+        existing.delete()
+
+    NeighborhoodStat.objects.bulk_create([
+        NeighborhoodStat(postal_code=postal, period=period, period_start=start, **values)
+        for (postal, period, start), values in counters.items()
+    ], batch_size=1000)
+    NeighborActivity.objects.bulk_create([
+        NeighborActivity(postal_code=postal, period=period, period_start=start, neighbor_id=neighbor_id)
+        for postal, period, start, neighbor_id in activity
+    ], batch_size=1000)
+    VolunteerStat.objects.bulk_create([
+        VolunteerStat(postal_code=postal, period=period, period_start=start, volunteer_id=volunteer_id, signups=total)
+        for (postal, period, start, volunteer_id), total in volunteer_signups.items()
+    ], batch_size=1000)
+    return len(counters)
@@ -1,3 +1,753 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache, caches
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import ExifTags, Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .db_routers import ReplicaHealth, begin_pinning, end_pinning, is_pinned_to_primary, replica_health
+from .media import get_thumbnail
+from .middleware import CompressionMiddleware, ReadYourWritesMiddleware
+from . import stats
+from .archive import archive_events, archive_posts, event_cutoff, months_ago, post_cutoff
+from .models import ArchivedEvent, ArchivedPost, Event, NeighborActivity, NeighborhoodStat, NeighborProfile, Post, Volunteer, VolunteerStat
+from .pubsub import InMemoryBroker, get_broker, neighborhood_channel, reset_broker
+
+
+# ------------------ LIVE UPDATES ------------------
+class InMemoryBrokerTests(SimpleTestCase):
+    async def test_publish_reaches_channel_subscribers_only(self):
+        broker = InMemoryBroker()
+        subscription = broker.subscribe('a')
+        other = broker.subscribe('b')
+        broker.publish('a', {'n': 1})
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {'n': 1})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(other.get(), 0.05)
+
+    async def test_slow_subscriber_drops_oldest(self):
+        broker = InMemoryBroker(queue_size=2)
+        subscription = broker.subscribe('a')
+        for n in range(3):
+            broker.publish('a', n)
+        self.assertEqual([await subscription.get(), await subscription.get()], [1, 2])
+
+    async def test_close_unsubscribes(self):
+        broker = InMemoryBroker()
+        broker.subscribe('a').close()
+        self.assertEqual(broker.subscriber_count('a'), 0)
+
+    def test_subscriber_on_closed_loop_is_dropped(self):
+        broker = InMemoryBroker()
+
+        async def subscribe():
+            return broker.subscribe('a')
+
+        asyncio.run(subscribe())  # the loop is closed once run() returns
+        broker.publish('a', {'n': 1})
+        self.assertEqual(broker.subscriber_count('a'), 0)
+
+
+class NeighborhoodStreamTests(TestCase):
+    def setUp(self):
+        reset_broker()
+        self.addCleanup(reset_broker)
+        self.user = User.objects.create_user(username='neighbor', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.channel = neighborhood_channel('12345')
+
+    def create_post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(title='Lost cat', content='Grey', created_by=self.profile)
+
+    def test_wsgi_request_is_refused(self):
+        response = self.client.get('/api/live/', **self.headers)
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(get_broker().subscriber_count(self.channel), 0)
+        # Saving still works afterwards
+        self.create_post()
+
+    async def test_stream_delivers_deltas_until_disconnect(self):
+        response = await self.async_client.get('/api/live/', headers={'Authorization': self.headers['HTTP_AUTHORIZATION']})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = asyncio.Queue()
+
+        async def consume():
+            async for chunk in response.streaming_content:
+                await chunks.put(chunk)
+
+        consumer = asyncio.create_task(consume())
+        self.assertEqual(await asyncio.wait_for(chunks.get(), 1), b'retry: 5000\n\n')
+        self.assertEqual(get_broker().subscriber_count(self.channel), 1)
+
+        post = await sync_to_async(self.create_post)()
+        message = await asyncio.wait_for(chunks.get(), 1)
+        self.assertTrue(message.startswith(b'event: post\n'))
+        self.assertIn(f'"id": {post.pk}'.encode(), message)
+
+        # A client disconnect cancels the response task
+        consumer.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await consumer
+        self.assertEqual(get_broker().subscriber_count(self.channel), 0)
+
+
+# ------------------ READ REPLICAS ------------------
+class RouterTestMixin:
+    def setUp(self):
+        cache.clear()
+        replica_health.refresh()
+        # Keep the writes below from pinning the rest of the test
+        token = begin_pinning(False)
+        self.user = User.objects.create_user(username='writer', password='secret')
+        self.other = User.objects.create_user(username='reader', password='secret')
+        end_pinning(token)
+        token = begin_pinning(False)
+        self.addCleanup(end_pinning, token)
+
+    def request(self, method, user):
+        request = RequestFactory().generic(method, '/api/posts/')
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+        return request
+
+    def read_alias(self, request, write=False):
+        """Run a request through the middleware and return the alias its read used."""
+        seen = {}
+
+        def view(request):
+            if write:
+                User.objects.filter(pk=self.user.pk).update(first_name='W')
+            seen['alias'] = User.objects.all().db
+            return HttpResponse()
+
+        ReadYourWritesMiddleware(view)(request)
+        return seen['alias']
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+@mock.patch.object(ReplicaHealth, 'lag', return_value=0.0)
+class PrimaryReplicaRouterTests(RouterTestMixin, TransactionTestCase):
+    """
+    Routing decisions for a replica_1 alias. Only the alias is compared, so no
+    replica database is needed; the health check's lag query is stubbed out.
+    (TransactionTestCase: reads inside a transaction always stay on the primary.)
+    """
+
+    def setUp(self):
+        with mock.patch.object(ReplicaHealth, 'lag', return_value=0.0):
+            super().setUp()
+
+    def test_reads_use_replica(self, lag):
+        self.assertEqual(User.objects.all().db, 'replica_1')
+
+    def test_write_pins_rest_of_request(self, lag):
+        self.assertEqual(self.read_alias(self.request('GET', self.user), write=True), DEFAULT_DB_ALIAS)
+
+    def test_writer_sticks_to_primary(self, lag):
+        self.read_alias(self.request('POST', self.user), write=True)
+        self.assertEqual(self.read_alias(self.request('GET', self.user)), DEFAULT_DB_ALIAS)
+        # Other users keep reading from the replica
+        self.assertEqual(self.read_alias(self.request('GET', self.other)), 'replica_1')
+
+    def test_stickiness_expires(self, lag):
+        with override_settings(READ_YOUR_WRITES_SECONDS=0):
+            self.read_alias(self.request('POST', self.user), write=True)
+        self.assertEqual(self.read_alias(self.request('GET', self.user)), 'replica_1')
+
+    def test_lagging_replica_is_skipped(self, lag):
+        lag.return_value = 10.0
+        replica_health.refresh()
+        self.assertEqual(User.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_objects_from_primary_keep_related_lookups_there(self, lag):
+        user = User.objects.using(DEFAULT_DB_ALIAS).get(pk=self.user.pk)
+        self.assertEqual(user.groups.all().db, DEFAULT_DB_ALIAS)
+
+
+@skipUnless(
+    'replica_1' in settings.DATABASE_REPLICAS,
+    "needs a replica, e.g. DB_URL=sqlite:///primary.sqlite3 DB_REPLICA_URLS=sqlite:///replica.sqlite3",
+)
+class ReplicaDatabaseTests(RouterTestMixin, TransactionTestCase):
+    """
+    Against a real replica_1 alias. The replica mirrors the primary's test
+    database, so both aliases see the same rows.
+    """
+    databases = '__all__'
+
+    def test_reads_use_replica(self):
+        self.assertEqual(User.objects.all().db, 'replica_1')
+        self.assertEqual(User.objects.filter(username='writer').count(), 1)
+
+    def test_lagging_replica_is_skipped(self):
+        with override_settings(REPLICA_MAX_LAG_SECONDS=-1):
+            replica_health.refresh()
+        self.assertEqual(User.objects.all().db, DEFAULT_DB_ALIAS)
+
+
+class ReadYourWritesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='secret')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.key = f'db-pin:user:{self.user.pk}'
+
+    def test_write_starts_window(self):
+        self.client.post('/api/volunteers/', {'name': 'n', 'phone': '1', 'events': []}, content_type='application/json', **self.headers)
+        self.assertIsNotNone(cache.get(self.key))
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=1)
+    def test_polling_does_not_renew_window(self):
+        def pinned(method, write=False):
+            seen = {}
+
+            def view(request):
+                if write:
+                    User.objects.filter(pk=self.user.pk).update(first_name='W')
+                seen['pinned'] = is_pinned_to_primary()
+                return HttpResponse()
+
+            request = RequestFactory().generic(method, '/api/posts/', **self.headers)
+            ReadYourWritesMiddleware(view)(request)
+            return seen['pinned']
+
+        pinned('POST', write=True)
+        time.sleep(0.6)
+        self.assertTrue(pinned('GET'))
+        time.sleep(0.6)
+        # 1.2s after the write: the GET at 0.6s must not have extended the window
+        self.assertFalse(pinned('GET'))
+
+    def test_batch_does_not_start_window(self):
+        response = self.client.post('/api/batch/', {'requests': ['/api/posts/']}, content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_batch_rejects_non_object_body(self):
+        response = self.client.post('/api/batch/', ['/api/posts/'], content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+# ------------------ VOLUNTEER COUNTS ------------------
+class VolunteerCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='organizer', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.event = Event.objects.create(title='Cleanup', description='d', date=timezone.now(), location='Park', created_by=self.profile)
+        self.volunteers = [Volunteer.objects.create(name=f'v{n}', phone=str(n)) for n in range(5)]
+
+    def count(self):
+        self.event.refresh_from_db()
+        return self.event.volunteer_count
+
+    def test_count_follows_roster_changes(self):
+        self.event.volunteers.add(*self.volunteers[:3])
+        self.assertEqual(self.count(), 3)
+        self.volunteers[3].events.add(self.event)
+        # Adding someone already on the roster changes nothing
+        self.event.volunteers.add(self.volunteers[0])
+        self.assertEqual(self.count(), 4)
+        self.event.volunteers.remove(self.volunteers[0], self.volunteers[4])
+        self.assertEqual(self.count(), 3)
+        self.volunteers[1].events.clear()
+        self.assertEqual(self.count(), 2)
+        self.volunteers[2].delete()
+        self.assertEqual(self.count(), 1)
+        self.event.volunteers.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_joining_twice_counts_once(self):
+        for _ in range(2):
+            response = self.client.post(f'/api/join-event/{self.event.pk}/', **self.headers)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.count(), 1)
+
+    def test_event_list_has_count_without_roster(self):
+        self.event.volunteers.add(*self.volunteers)
+        event = self.client.get('/api/events/', **self.headers).json()[0]
+        self.assertEqual(event['volunteer_count'], 5)
+        self.assertNotIn('volunteers', event)
+
+    def test_roster_is_paginated(self):
+        self.event.volunteers.add(*self.volunteers)
+        page = self.client.get(f'/api/event-volunteers/{self.event.pk}/?page_size=2&page=2', **self.headers).json()
+        self.assertEqual(page['count'], 5)
+        self.assertEqual([v['id'] for v in page['results']], [v.pk for v in self.volunteers[2:4]])
+        everyone = self.client.get(f'/api/event-volunteers/{self.event.pk}/?all=true', **self.headers).json()
+        self.assertEqual(len(everyone), 5)
+
+    def test_profile_pages_keep_rosters(self):
+        self.event.volunteers.add(self.volunteers[0])
+        for url in ('/api/my-profile/', f'/api/neighbors/{self.profile.pk}/'):
+            data = self.client.get(url, **self.headers).json()
+            self.assertEqual([v['id'] for v in data['created_events'][0]['volunteers']], [self.volunteers[0].pk])
+
+
+# ------------------ FIELD SELECTION ------------------
+class FieldSelectionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='organizer', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.volunteer = Volunteer.objects.create(name='Sam', phone='2')
+        self.event = self.add_event()
+
+    def add_event(self):
+        event = Event.objects.create(title='Cleanup', description='d', date=timezone.now(), location='Park', created_by=self.profile)
+        event.volunteers.add(self.volunteer)
+        Post.objects.create(title='Hello', content='c', created_by=self.profile)
+        return event
+
+    def get(self, url):
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.get(url)
+        return len(queries)
+
+    def test_fields_trims_output(self):
+        self.assertEqual(set(self.get('/api/events/?fields=id,title')[0]), {'id', 'title'})
+        self.assertEqual(set(self.get('/api/posts/?fields=id,created_by')[0]), {'id', 'created_by'})
+        # Unknown names are ignored
+        self.assertEqual(set(self.get('/api/events/?fields=id,nope')[0]), {'id'})
+
+    def test_expand_adds_roster_to_list(self):
+        self.assertNotIn('volunteers', self.get('/api/events/')[0])
+        event = self.get('/api/events/?expand=volunteers')[0]
+        self.assertEqual(event['volunteers'], [{'id': self.volunteer.pk, 'name': 'Sam', 'phone': '2'}])
+        self.assertEqual(set(self.get('/api/events/?fields=id&expand=volunteers')[0]), {'id', 'volunteers'})
+
+    def test_detail_includes_roster_unless_fields_leaves_it_out(self):
+        url = f'/api/events/{self.event.pk}/'
+        self.assertIn('volunteers', self.get(url))
+        self.assertEqual(set(self.get(url + '?fields=id,title')), {'id', 'title'})
+        self.assertEqual(set(self.get(url + '?fields=id,volunteers')), {'id', 'volunteers'})
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        urls = ['/api/events/', '/api/events/?expand=volunteers', '/api/posts/', '/api/volunteers/', '/api/events/?fields=id,created_by']
+        before = [self.queries(url) for url in urls]
+        for _ in range(3):
+            self.add_event()
+        self.assertEqual([self.queries(url) for url in urls], before)
+
+    def test_fields_narrows_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get('/api/posts/?fields=id,title')
+        select = next(q['sql'] for q in queries if 'FROM "main_app_post"' in q['sql'])
+        self.assertNotIn('"content"', select)
+
+
+# ------------------ ADMIN ------------------
+@override_settings(ADMIN_BATCH_SIZE=2)
+class DeleteInBatchesTests(TestCase):
+    url = '/admin/main_app/neighborprofile/'
+
+    def setUp(self):
+        self.profiles = []
+        for n in range(3):
+            user = User.objects.create_user(username=f'neighbor{n}')
+            profile = NeighborProfile.objects.create(user=user, house_number='1', street='Main', postal_code='12345', phone=str(n))
+            Post.objects.create(title='Hello', content='c', created_by=profile)
+            self.profiles.append(profile)
+        self.selection = {
+            'action': 'delete_in_batches', 'index': 0, 'select_across': 0,
+            helpers.ACTION_CHECKBOX_NAME: [profile.pk for profile in self.profiles],
+        }
+
+    def login(self, *permissions):
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(codename__in=permissions))
+        self.client.force_login(staff)
+
+    def test_replaces_delete_selected(self):
+        self.client.force_login(User.objects.create_superuser(username='admin'))
+        actions = self.client.get(self.url).context['action_form'].fields['action'].choices
+        self.assertIn('delete_in_batches', dict(actions))
+        self.assertNotIn('delete_selected', dict(actions))
+
+    def test_confirmation_shows_counts(self):
+        self.client.force_login(User.objects.create_superuser(username='admin'))
+        response = self.client.post(self.url, self.selection)
+        self.assertEqual(response.status_code, 200)
+        model_count = dict(response.context['model_count'])
+        self.assertEqual((model_count['neighbor profiles'], model_count['posts']), (3, 3))
+        self.assertEqual(NeighborProfile.objects.count(), 3)
+
+    def test_confirmed_delete_runs_in_batches_and_logs(self):
+        self.client.force_login(User.objects.create_superuser(username='admin'))
+        response = self.client.post(self.url, {**self.selection, 'post': 'yes'})
+        self.assertRedirects(response, self.url)
+        self.assertFalse(NeighborProfile.objects.exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(
+            set(LogEntry.objects.filter(action_flag=DELETION).values_list('object_id', flat=True)),
+            {str(profile.pk) for profile in self.profiles},
+        )
+
+    def test_related_delete_permission_is_required(self):
+        self.login('view_neighborprofile', 'delete_neighborprofile')
+        response = self.client.post(self.url, {**self.selection, 'post': 'yes'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['perms_lacking'], ['posts'])
+        self.assertEqual(NeighborProfile.objects.count(), 3)
+
+    def test_delete_permission_is_required(self):
+        self.login('view_neighborprofile')
+        self.client.post(self.url, {**self.selection, 'post': 'yes'})
+        self.assertEqual(NeighborProfile.objects.count(), 3)
+
+
+# ------------------ COMPRESSION ------------------
+@mock.patch('main_app.middleware.brotli', None)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"items": [' + b'"neighbor", ' * 200 + b'"end"]}'
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.COMPRESSION_CACHE_ALIAS].clear()
+
+    def get(self, response, accept='gzip'):
+        request = RequestFactory().get('/api/posts/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate(self):
+        negotiate = CompressionMiddleware(None).negotiate
+        self.assertEqual(negotiate('deflate, gzip'), 'gzip')
+        self.assertIsNone(negotiate('gzip;q=0'))
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate('br'))
+        self.assertEqual(negotiate('*'), 'gzip')
+        self.assertIsNone(negotiate('*;q=0'))
+        self.assertEqual(negotiate('*;q=0, gzip;q=0.5'), 'gzip')
+
+    def test_negotiate_prefers_brotli_when_installed(self):
+        negotiate = CompressionMiddleware(None).negotiate
+        with mock.patch('main_app.middleware.brotli', object()):
+            self.assertEqual(negotiate('gzip, br'), 'br')
+            self.assertEqual(negotiate('gzip, br;q=0'), 'gzip')
+
+    def test_small_bodies_are_left_alone(self):
+        with override_settings(COMPRESSION_MIN_SIZE=len(self.body) + 1):
+            response = self.get(HttpResponse(self.body, content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_large_bodies_are_compressed(self):
+        response = self.get(HttpResponse(self.body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_event_streams_are_left_alone(self):
+        response = self.get(StreamingHttpResponse(iter([self.body]), content_type='text/event-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_bodies_are_compressed_chunk_by_chunk(self):
+        chunks = [self.body[:100], self.body[100:]]
+        response = self.get(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    async def test_async_streaming_bodies_are_compressed(self):
+        async def chunks():
+            yield self.body[:100]
+            yield self.body[100:]
+
+        response = self.get(StreamingHttpResponse(chunks(), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join([chunk async for chunk in response.streaming_content])), self.body)
+
+    def test_compressed_bodies_do_not_evict_pins(self):
+        cache.set('db-pin:user:1', 1)
+        for n in range(400):
+            body = self.body + str(n).encode()
+            self.get(HttpResponse(body, content_type='application/json'))
+        self.assertIsNotNone(cache.get('db-pin:user:1'))
+        self.assertIsNotNone(caches[settings.COMPRESSION_CACHE_ALIAS].get(
+            CompressionMiddleware(None).cache_key(self.body + b'399', 'gzip')
+        ))
+
+
+# ------------------ MEDIA ------------------
+class ThumbnailTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.original = os.path.join(root, 'photo.jpg')
+        override = override_settings(THUMBNAIL_ROOT=os.path.join(root, 'thumbnails'))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def save(self, size, orientation=None):
+        exif = Image.Exif()
+        if orientation:
+            exif[ExifTags.Base.Orientation] = orientation
+        Image.new('RGB', size).save(self.original, exif=exif)
+
+    def thumbnail_size(self, width):
+        path = get_thumbnail(self.original, 'photo.jpg', width)
+        with Image.open(path) as image:
+            return path, image.size
+
+    def test_scales_to_width(self):
+        self.save((800, 600))
+        self.assertEqual(self.thumbnail_size(320)[1], (320, 240))
+
+    def test_rotated_photo_is_bounded_by_displayed_width(self):
+        # Orientation 6: stored landscape, displayed portrait
+        self.save((800, 600), orientation=6)
+        self.assertEqual(self.thumbnail_size(320)[1], (320, 427))
+
+    def test_rotated_photo_narrower_than_width_is_served_as_is(self):
+        self.save((800, 600), orientation=6)
+        path, _ = self.thumbnail_size(640)
+        self.assertEqual(path, self.original)
+
+
+# ------------------ NEIGHBORHOOD STATS ------------------
+class NeighborhoodStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='organizer', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.now = timezone.now()
+
+    def event(self, days, **kwargs):
+        return Event.objects.create(
+            title='Cleanup', description='d', date=self.now + timedelta(days=days), location='Park', created_by=self.profile, **kwargs,
+        )
+
+    def rollups(self):
+        """All rollup rows, leaving out the all-zero ones reconcile() drops."""
+        return (
+            set(NeighborhoodStat.objects.exclude(posts=0, events=0, volunteer_signups=0, active_neighbors=0).values_list(
+                'postal_code', 'period', 'period_start', 'posts', 'events', 'volunteer_signups', 'active_neighbors',
+            )),
+            set(VolunteerStat.objects.exclude(signups=0).values_list('period', 'period_start', 'volunteer_id', 'signups')),
+            set(NeighborActivity.objects.values_list('period', 'period_start', 'neighbor_id')),
+        )
+
+    def test_incremental_updates_match_reconcile(self):
+        volunteers = [Volunteer.objects.create(name=f'v{n}', phone=str(n)) for n in range(4)]
+        post = Post.objects.create(title='Hello', content='c', created_by=self.profile)
+        Post.objects.create(title='Again', content='c', created_by=self.profile)
+        event = self.event(-40)
+        other = self.event(-80)
+        event.volunteers.add(*volunteers[:3])
+        volunteers[3].events.add(event, other)
+        event.date = self.now + timedelta(days=20)
+        event.save()
+        event.volunteers.remove(volunteers[0])
+        volunteers[1].delete()
+        volunteers[2].events.clear()
+        post.delete()
+        other.delete()
+
+        incremental = self.rollups()
+        stats.reconcile()
+        self.assertEqual(incremental, self.rollups())
+
+    def test_rescheduled_event_leaves_old_period(self):
+        event = self.event(-80)
+        old_periods = stats.period_starts(event.date)
+        event.date = self.now
+        event.save()
+        self.assertFalse(NeighborActivity.objects.filter(period_start__in=old_periods.values()).exists())
+        self.assertEqual(
+            set(NeighborhoodStat.objects.filter(period_start__in=old_periods.values()).values_list('events', 'active_neighbors')),
+            {(0, 0)},
+        )
+
+    def test_series_is_contiguous_and_zero_filled(self):
+        Post.objects.create(title='Hello', content='c', created_by=self.profile)
+        self.event(-70)
+        response = self.client.get('/api/stats/?period=month&limit=4', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        series = response.json()['series']
+        this_month = stats.period_starts(self.now)[NeighborhoodStat.MONTH]
+        self.assertEqual(
+            [row['period_start'] for row in series],
+            [start.isoformat() for start in stats.recent_period_starts(NeighborhoodStat.MONTH, 4, this_month)],
+        )
+        self.assertEqual(series[0]['posts'], 1)
+        self.assertEqual(sum(row['events'] for row in series), 1)
+        self.assertEqual(sum(1 for row in series if not any(row[key] for key in ('posts', 'events'))), 2)
+
+    def test_series_extends_to_future_events(self):
+        self.event(40)
+        series = self.client.get('/api/stats/?limit=2&period=month', **self.headers).json()['series']
+        self.assertEqual(series[0]['period_start'], stats.period_starts(self.now + timedelta(days=40))['month'].isoformat())
+
+    def test_top_volunteers(self):
+        volunteer = Volunteer.objects.create(name='Sam', phone='2')
+        volunteer.events.add(self.event(0), self.event(1))
+        top = self.client.get('/api/stats/?period=month&limit=3', **self.headers).json()['top_volunteers']
+        self.assertEqual(top, [{'id': volunteer.pk, 'name': 'Sam', 'signups': 2}])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/stats/?period=year', **self.headers).status_code, 400)
+        self.assertEqual(self.client.get('/api/stats/?limit=x', **self.headers).status_code, 400)
+
+
+# ------------------ DELTA SYNC ------------------
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TransactionTestCase):
+    """
+    TransactionTestCase: on PostgreSQL only committed transactions are below the
+    sync horizon, so the writes must really commit.
+    """
+    # Outside a transaction other reads may go to a configured replica
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='neighbor', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        # Start after the setup's own entries
+        self.cursor = self.sync()['cursor']
+
+    def sync(self, **params):
+        params.setdefault('since', getattr(self, 'cursor', '0'))
+        response = self.client.get('/api/sync/', params, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def post(self, title='Hello', **kwargs):
+        return Post.objects.create(title=title, content='c', created_by=self.profile, **kwargs)
+
+    def test_paginates_with_has_more(self):
+        posts = [self.post(f'p{n}') for n in range(3)]
+        first = self.sync(limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual([post['id'] for post in first['posts']['updated']], [posts[0].pk, posts[1].pk])
+
+        second = self.sync(since=first['cursor'], limit=2)
+        self.assertFalse(second['has_more'])
+        self.assertEqual([post['id'] for post in second['posts']['updated']], [posts[2].pk])
+
+        # Nothing new: the cursor stays put
+        third = self.sync(since=second['cursor'])
+        self.assertEqual(third['cursor'], second['cursor'])
+        self.assertEqual(third['posts'], {'updated': [], 'deleted': []})
+
+    def test_only_latest_action_per_object(self):
+        post = self.post()
+        post.title = 'Edited'
+        post.save()
+        page = self.sync()
+        self.assertEqual([p['title'] for p in page['posts']['updated']], ['Edited'])
+
+    def test_delete_yields_tombstone(self):
+        post = self.post()
+        self.cursor = self.sync()['cursor']
+        post_id = post.pk
+        post.delete()
+        page = self.sync()
+        self.assertEqual(page['posts'], {'updated': [], 'deleted': [post_id]})
+
+    def test_archiving_yields_no_tombstone(self):
+        event = Event.objects.create(
+            title='Old', description='d', date=timezone.now() - timedelta(days=90), location='Park', created_by=self.profile,
+        )
+        self.cursor = self.sync()['cursor']
+        self.assertEqual(archive_events(timezone.now() - timedelta(days=30)), 1)
+        self.assertTrue(ArchivedEvent.objects.filter(pk=event.pk).exists())
+        page = self.sync()
+        self.assertEqual(page['events'], {'updated': [], 'deleted': []})
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_fresh_entries_wait_for_the_settle_window(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest("PostgreSQL uses the transaction horizon instead")
+        self.post()
+        self.assertEqual(self.sync()['posts']['updated'], [])
+
+    def test_invalid_cursor(self):
+        for since in ('abc', '-1', '1.-2'):
+            response = self.client.get('/api/sync/', {'since': since}, **self.headers)
+            self.assertEqual(response.status_code, 400)
+
+
+# ------------------ ARCHIVE ------------------
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='neighbor', password='secret')
+        self.profile = NeighborProfile.objects.create(user=self.user, house_number='1', street='Main', postal_code='12345', phone='1')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        now = timezone.now()
+        self.volunteer = Volunteer.objects.create(name='Sam', phone='2')
+        self.old_event = Event.objects.create(title='Old', description='d', date=now - timedelta(days=90), location='Park', created_by=self.profile)
+        self.new_event = Event.objects.create(title='New', description='d', date=now + timedelta(days=1), location='Park', created_by=self.profile)
+        self.old_event.volunteers.add(self.volunteer)
+        self.old_post = Post.objects.create(title='Old', content='c', created_by=self.profile)
+        Post.objects.filter(pk=self.old_post.pk).update(created_at=months_ago(now, 12))
+        self.new_post = Post.objects.create(title='New', content='c', created_by=self.profile)
+        self.rollups = self.stats_rows()
+        self.assertEqual(archive_events(event_cutoff(now, 30)), 1)
+        self.assertEqual(archive_posts(post_cutoff(now, 6)), 1)
+
+    def stats_rows(self):
+        return set(NeighborhoodStat.objects.values_list('period', 'period_start', 'posts', 'events', 'volunteer_signups'))
+
+    def get(self, url):
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rows_move_with_their_ids_and_volunteers(self):
+        self.assertEqual(list(Event.objects.values_list('pk', flat=True)), [self.new_event.pk])
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.new_post.pk])
+        archived = ArchivedEvent.objects.get(pk=self.old_event.pk)
+        self.assertEqual(list(archived.volunteers.all()), [self.volunteer])
+        self.assertEqual(archived.volunteer_count, 1)
+        self.assertTrue(ArchivedPost.objects.filter(pk=self.old_post.pk, title='Old').exists())
+
+    def test_archiving_keeps_rollups(self):
+        self.assertEqual(self.stats_rows(), self.rollups)
+
+    def test_archived_ids_are_not_reused(self):
+        Post.objects.filter(pk=self.new_post.pk).delete()
+        post = Post.objects.create(title='Newer', content='c', created_by=self.profile)
+        self.assertGreater(post.pk, self.new_post.pk)
+
+    def test_lists_only_include_archived_rows_on_request(self):
+        self.assertEqual([event['id'] for event in self.get('/api/events/')], [self.new_event.pk])
+        self.assertEqual(
+            [event['id'] for event in self.get('/api/events/?include_archived=true')],
+            [self.old_event.pk, self.new_event.pk],
+        )
+        self.assertEqual([post['id'] for post in self.get('/api/posts/')], [self.new_post.pk])
+        self.assertEqual(
+            [post['id'] for post in self.get('/api/posts/?include_archived=true')],
+            [self.new_post.pk, self.old_post.pk],
+        )
+
+    def test_detail_finds_archived_rows_on_request(self):
+        self.assertEqual(self.client.get(f'/api/events/{self.old_event.pk}/', **self.headers).status_code, 404)
+        event = self.get(f'/api/events/{self.old_event.pk}/?include_archived=true')
+        self.assertEqual([volunteer['id'] for volunteer in event['volunteers']], [self.volunteer.pk])
+        self.assertEqual(self.client.get(f'/api/posts/{self.old_post.pk}/', **self.headers).status_code, 404)
+        self.assertEqual(self.get(f'/api/posts/{self.old_post.pk}/?include_archived=true')['title'], 'Old')
@@ -5,7 +5,9 @@ from .views import (
     EventListCreateView, EventDetailView,
     VolunteerListCreateView, VolunteerDetailView, DeleteMyAccountView,
     NeighborListCreateView, JoinEventView, SignupUserView, LogoutView, MyNeighborProfileView, EventVolunteersView, NeighborDetailView,
+    BatchView, SyncView, NeighborhoodStatsView,
 )
+from .realtime import neighborhood_stream
 
 urlpatterns = [
     # Posts
@@ -27,6 +29,18 @@ urlpatterns = [
     path('join-event/<int:event_id>/', JoinEventView.as_view(), name='join-event'),
     path('my-profile/', MyNeighborProfileView.as_view(), name='my_neighbor_profile'),
 
+    # Neighborhood dashboards
+    path('stats/', NeighborhoodStatsView.as_view(), name='neighborhood-stats'),
+
+    # Incremental sync for offline clients
+    path('sync/', SyncView.as_view(), name='sync'),
+
+    # Batched startup requests
+    path('batch/', BatchView.as_view(), name='batch'),
+
+    # Live updates (server-sent events, served through asgi.py)
+    path('live/', neighborhood_stream, name='live'),
+
     # JWT Authentication
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
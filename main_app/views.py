@@ -1,16 +1,56 @@
+import asyncio
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import PostSerializer
 from rest_framework import generics
-from django.db import models
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models
+from django.db.models import Q
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Post, Event, Volunteer, NeighborProfile
-from .serializers import PostSerializer, EventSerializer, VolunteerSerializer, NeighborProfileSerializer
+from .models import (
+    Post, Event, Volunteer, NeighborProfile, ArchivedPost, ArchivedEvent, ChangeLog,
+    NeighborhoodStat, VolunteerStat,
+)
+from .serializers import (
+    param_set, PostSerializer, EventSerializer, VolunteerSerializer, NeighborProfileSerializer,
+    ArchivedPostSerializer, ArchivedEventSerializer, NeighborhoodStatSerializer,
+)
 from rest_framework.permissions import AllowAny, IsAuthenticated,  IsAdminUser 
+from rest_framework.pagination import PageNumberPagination
+from . import stats
+
+logger = logging.getLogger(__name__)
+
+
+def get_current_neighbor(request):
+    """
+    Return the current user's NeighborProfile or raise 404.
+    The profile is cached on the user object, so repeated lookups within a request
+    (or across the sub-requests of a batch) hit the database only once.
+    """
+    try:
+        return request.user.neighborprofile
+    except NeighborProfile.DoesNotExist:
+        raise Http404("No NeighborProfile matches the given query.")
+
+
+def include_archived(request):
+    """True when the client opted into archived rows with ?include_archived=true."""
+    return request.query_params.get('include_archived', 'false').lower() == 'true'
 
 # ------------------ POSTS ------------------
 
@@ -19,14 +59,20 @@ class PostListCreateView(APIView):
     parser_classes = [MultiPartParser, FormParser]  
 
     def get(self, request):
-        """List all posts ordered by creation date descending."""
-        posts = Post.objects.all().order_by('-created_at')
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        """
+        List all posts ordered by creation date descending. Supports ?fields=.
+        Archived posts are appended (they are all older) with ?include_archived=true.
+        """
+        posts = PostSerializer.prepare_queryset(Post.objects.order_by('-created_at'), request)
+        data = PostSerializer(posts, many=True, context={'request': request}).data
+        if include_archived(request):
+            archived = ArchivedPostSerializer.prepare_queryset(ArchivedPost.objects.order_by('-created_at'), request)
+            data = data + ArchivedPostSerializer(archived, many=True, context={'request': request}).data
+        return Response(data)
 
     def post(self, request):
         """Create a new post and automatically assign it to the current user."""
-        neighbor = get_object_or_404(NeighborProfile, user=request.user)
+        neighbor = get_current_neighbor(request)
         serializer = PostSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save(created_by=neighbor)
@@ -37,7 +83,12 @@ class PostDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        post = get_object_or_404(Post, id=pk)
+        post = PostSerializer.prepare_queryset(Post.objects.all(), request).filter(id=pk).first()
+        if post is None and include_archived(request):
+            post = get_object_or_404(ArchivedPostSerializer.prepare_queryset(ArchivedPost.objects.all(), request), id=pk)
+            return Response(ArchivedPostSerializer(post, context={'request': request}).data)
+        if post is None:
+            raise Http404("No Post matches the given query.")
         serializer = PostSerializer(post, context={'request': request})
         return Response(serializer.data)
 
@@ -65,18 +116,23 @@ class EventListCreateView(APIView):
 
     def get(self, request):
         """
-        List all events ordered by date ascending.
+        List all events ordered by date ascending. Supports ?fields=.
+        Each event carries volunteer_count; add ?expand=volunteers for the nested rosters.
+        Past events that were archived come first with ?include_archived=true.
         """
-        events = Event.objects.all().order_by('date')
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
+        events = EventSerializer.prepare_queryset(Event.objects.order_by('date'), request)
+        data = EventSerializer(events, many=True, context={'request': request}).data
+        if include_archived(request):
+            archived = ArchivedEventSerializer.prepare_queryset(ArchivedEvent.objects.order_by('date'), request)
+            data = ArchivedEventSerializer(archived, many=True, context={'request': request}).data + data
+        return Response(data)
 
     def post(self, request):
         """
         Create a new event and automatically assign the creator (NeighborProfile).
         """
         # Get the NeighborProfile for the logged-in user
-        neighbor = get_object_or_404(NeighborProfile, user=request.user)
+        neighbor = get_current_neighbor(request)
 
         # Pass the event data
         serializer = EventSerializer(data=request.data, context={'request': request})
@@ -91,10 +147,21 @@ class EventDetailView(APIView):
 
     def get(self, request, pk):
         """
-        Retrieve a single event by ID, including nested volunteers.
-        """
-        event = get_object_or_404(Event, id=pk)
-        serializer = EventSerializer(event)
+        Retrieve a single event by ID, including nested volunteers unless ?fields= omits them.
+        Archived events are found too with ?include_archived=true.
+        """
+        context = {'request': request}
+        # The roster is included by default, unless ?fields= leaves it out
+        fields = param_set(request, 'fields')
+        if fields is None or 'volunteers' in fields:
+            context['expand'] = ['volunteers']
+        event = EventSerializer.prepare_queryset(Event.objects.all(), request, context).filter(id=pk).first()
+        if event is None and include_archived(request):
+            event = get_object_or_404(ArchivedEventSerializer.prepare_queryset(ArchivedEvent.objects.all(), request, context), id=pk)
+            return Response(ArchivedEventSerializer(event, context=context).data)
+        if event is None:
+            raise Http404("No Event matches the given query.")
+        serializer = EventSerializer(event, context=context)
         return Response(serializer.data)
 
     def put(self, request, pk):
@@ -133,7 +200,7 @@ class VolunteerListCreateView(APIView):
 
     def get(self, request):
         """
-        List all volunteers, or top 10 volunteers if ?top=true.
+        List all volunteers, or top 10 volunteers if ?top=true. Supports ?fields=.
         """
         top = request.query_params.get('top', 'false').lower() == 'true'
 
@@ -141,11 +208,14 @@ class VolunteerListCreateView(APIView):
              
              volunteers = Volunteer.objects.annotate(
                 total_events=models.Count('events')
-            ).order_by('-total_events')[:10]
+            ).order_by('-total_events')
         else:
             volunteers = Volunteer.objects.all().order_by('-id')
+        volunteers = VolunteerSerializer.prepare_queryset(volunteers, request)
+        if top:
+            volunteers = volunteers[:10]
 
-        serializer = VolunteerSerializer(volunteers, many=True)
+        serializer = VolunteerSerializer(volunteers, many=True, context={'request': request})
         return Response(serializer.data)
 
     def post(self, request):
@@ -166,8 +236,8 @@ class VolunteerDetailView(APIView):
         """
         Retrieve a volunteer by ID.
         """
-        volunteer = get_object_or_404(Volunteer, id=pk)
-        serializer = VolunteerSerializer(volunteer)
+        volunteer = get_object_or_404(VolunteerSerializer.prepare_queryset(Volunteer.objects.all(), request), id=pk)
+        serializer = VolunteerSerializer(volunteer, context={'request': request})
         return Response(serializer.data)
 
     def put(self, request, pk):
@@ -191,14 +261,31 @@ class VolunteerDetailView(APIView):
     
 # ------------------ EVENT VOLUNTEERS ------------------
 
+class VolunteerRosterPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class EventVolunteersView(APIView):
     permission_classes = [IsAuthenticated]  
 
     def get(self, request, event_id):
+        """
+        List an event's volunteers, one page at a time (?page=, ?page_size=).
+        Pass ?all=true to get the full roster in a single unpaginated list.
+        """
         event = get_object_or_404(Event, id=event_id)
-        volunteers = event.volunteers.all()
-        serializer = VolunteerSerializer(volunteers, many=True)
-        return Response(serializer.data)
+        volunteers = VolunteerSerializer.prepare_queryset(event.volunteers.order_by('id'), request)
+
+        if request.query_params.get('all', 'false').lower() == 'true':
+            serializer = VolunteerSerializer(volunteers, many=True, context={'request': request})
+            return Response(serializer.data)
+
+        paginator = VolunteerRosterPagination()
+        page = paginator.paginate_queryset(volunteers, request, view=self)
+        serializer = VolunteerSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
  
 
@@ -208,15 +295,16 @@ class NeighborListCreateView(APIView):
 
     def get(self, request):
         """
-        List all neighbors with the same street as the current user.
+        List all neighbors with the same street as the current user. Supports ?fields=.
         """
         try:
-            current_neighbor = NeighborProfile.objects.get(user=request.user)
+            current_neighbor = get_current_neighbor(request)
             neighbors = NeighborProfile.objects.filter(postal_code=current_neighbor.postal_code).exclude(id=current_neighbor.id)
-        except NeighborProfile.DoesNotExist:
+        except Http404:
              neighbors = NeighborProfile.objects.none()
 
-        serializer = NeighborProfileSerializer(neighbors, many=True)
+        neighbors = NeighborProfileSerializer.prepare_queryset(neighbors, request)
+        serializer = NeighborProfileSerializer(neighbors, many=True, context={'request': request})
         return Response(serializer.data)
 
 
@@ -245,17 +333,20 @@ class NeighborDetailView(APIView):
         posts = Post.objects.filter(created_by=neighbor)
         posts_data = PostSerializer(posts, many=True).data
 
-        # Events created by this neighbor
-        created_events = Event.objects.filter(created_by=neighbor)
-        created_events_data = EventSerializer(created_events, many=True).data
+        # Events created by this neighbor, with their volunteers
+        expand = {'expand': ['volunteers']}
+        created_events = EventSerializer.prepare_queryset(Event.objects.filter(created_by=neighbor), None, expand)
+        created_events_data = EventSerializer(created_events, many=True, context=expand).data
 
         # Events the neighbor joined as a volunteer
         volunteer_entries = Volunteer.objects.filter(
             name=neighbor.user.username
         ) | Volunteer.objects.filter(phone=neighbor.phone)
 
-        joined_events = Event.objects.filter(volunteers__in=volunteer_entries).distinct()
-        joined_events_data = EventSerializer(joined_events, many=True).data
+        joined_events = EventSerializer.prepare_queryset(
+            Event.objects.filter(volunteers__in=volunteer_entries).distinct(), None, expand
+        )
+        joined_events_data = EventSerializer(joined_events, many=True, context=expand).data
 
         return Response({
             "profile": profile_data,
@@ -284,7 +375,7 @@ class MyNeighborProfileView(APIView):
         created events, and events they've joined.
         """
         # Get the profile of the currently logged-in user
-        neighbor = get_object_or_404(NeighborProfile, user=request.user)
+        neighbor = get_current_neighbor(request)
         profile_data = NeighborProfileSerializer(neighbor).data
 
         # Check if profile is complete
@@ -294,17 +385,20 @@ class MyNeighborProfileView(APIView):
         posts = Post.objects.filter(created_by=neighbor)
         posts_data = PostSerializer(posts, many=True).data
 
-        # Get events created by this user
-        created_events = Event.objects.filter(created_by=neighbor)
-        created_events_data = EventSerializer(created_events, many=True).data
+        # Get events created by this user, with their volunteers
+        expand = {'expand': ['volunteers']}
+        created_events = EventSerializer.prepare_queryset(Event.objects.filter(created_by=neighbor), None, expand)
+        created_events_data = EventSerializer(created_events, many=True, context=expand).data
 
         # Get events the user has joined
         volunteer_entries = Volunteer.objects.filter(
             name=neighbor.user.username
         ) | Volunteer.objects.filter(phone=neighbor.phone)
 
-        joined_events = Event.objects.filter(volunteers__in=volunteer_entries).distinct()
-        joined_events_data = EventSerializer(joined_events, many=True).data
+        joined_events = EventSerializer.prepare_queryset(
+            Event.objects.filter(volunteers__in=volunteer_entries).distinct(), None, expand
+        )
+        joined_events_data = EventSerializer(joined_events, many=True, context=expand).data
 
         return Response({
             "profile": profile_data,
@@ -318,7 +412,7 @@ class MyNeighborProfileView(APIView):
         """
         Update the profile of the currently logged-in user.
         """
-        neighbor = get_object_or_404(NeighborProfile, user=request.user)
+        neighbor = get_current_neighbor(request)
         serializer = NeighborProfileSerializer(neighbor, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -335,7 +429,7 @@ class JoinEventView(APIView):
         Allow the authenticated user to join an event as a volunteer.
         """
         event = get_object_or_404(Event, id=event_id)
-        profile = get_object_or_404(NeighborProfile, user=request.user)
+        profile = get_current_neighbor(request)
 
         # Create or get existing volunteer record
         volunteer, created = Volunteer.objects.get_or_create(
@@ -345,6 +439,245 @@ class JoinEventView(APIView):
         volunteer.events.add(event)
         return Response({"message": "Joined the event successfully!"})
 
+# ------------------ BATCH ------------------
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    # Only GETs are batched, so a batch doesn't start the user's read-your-writes window
+    read_only = True
+
+    def post(self, request):
+        """
+        Run several read-only API requests in one round-trip, e.g. on app startup:
+        {"requests": ["/api/my-profile/", "/api/posts/?fields=id,title", {"path": "/api/volunteers/?top=true"}]}
+        Authentication and the profile lookup happen once and are shared by every
+        sub-request. Responses come back in order as {"path", "status", "body"}.
+        """
+        if not isinstance(request.data, dict):
+            return Response({"error": "Send a JSON object with a 'requests' list."}, status=status.HTTP_400_BAD_REQUEST)
+        items = request.data.get('requests')
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Provide a non-empty 'requests' list."}, status=status.HTTP_400_BAD_REQUEST)
+        max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(items) > max_requests:
+            return Response({"error": f"A batch can contain at most {max_requests} requests."}, status=status.HTTP_400_BAD_REQUEST)
+
+        paths = []
+        for item in items:
+            path = item.get('path') if isinstance(item, dict) else item
+            method = item.get('method', 'GET').upper() if isinstance(item, dict) else 'GET'
+            if not isinstance(path, str) or method != 'GET':
+                return Response({"error": "Each request must be a path string or {'path': ...}; only GET is supported."}, status=status.HTTP_400_BAD_REQUEST)
+            paths.append(path)
+
+        # Warm the shared profile cache before sub-requests (possibly in threads) need it
+        try:
+            get_current_neighbor(request)
+        except Http404:
+            pass
+
+        workers = min(getattr(settings, 'BATCH_MAX_WORKERS', 4), len(paths))
+        # Threads use their own connections, which can't see an open transaction's writes
+        if workers <= 1 or connection.in_atomic_block:
+            responses = [self.run_subrequest(request, path) for path in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self.run_in_thread, request, path)
+                    for path in paths
+                ]
+                responses = [future.result() for future in futures]
+        return Response({"responses": responses})
+
+    def run_in_thread(self, request, path):
+        try:
+            return self.run_subrequest(request, path)
+        finally:
+            connections.close_all()
+
+    def run_subrequest(self, request, path):
+        url = urlsplit(path)
+        if not url.path.startswith('/api/') or url.path.rstrip('/') == '/api/batch':
+            return {"path": path, "status": status.HTTP_400_BAD_REQUEST, "body": {"error": "Only /api/ endpoints can be batched."}}
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return {"path": path, "status": status.HTTP_404_NOT_FOUND, "body": {"error": "Not found."}}
+        if asyncio.iscoroutinefunction(match.func):
+            return {"path": path, "status": status.HTTP_400_BAD_REQUEST, "body": {"error": "Streaming endpoints can't be batched."}}
+
+        sub_request = HttpRequest()
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.META = {
+            key: value for key, value in request.META.items()
+            if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'wsgi.input')
+        }
+        sub_request.META.update({'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query})
+        sub_request.GET = QueryDict(url.query)
+        # DRF skips its authenticators when a user is forced on the request
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception("Batched request to %s failed", path)
+            return {"path": path, "status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"error": "Internal server error."}}
+
+        if hasattr(response, 'data'):
+            body = response.data
+        elif response.get('Content-Type', '').startswith('application/json'):
+            body = json.loads(response.content)
+        else:
+            body = None
+        return {"path": path, "status": response.status_code, "body": body}
+
+
+# ------------------ SYNC ------------------
+class SyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    SERIALIZERS = {
+        ChangeLog.POST: ('posts', Post, PostSerializer),
+        ChangeLog.EVENT: ('events', Event, EventSerializer),
+        ChangeLog.VOLUNTEER: ('volunteers', Volunteer, VolunteerSerializer),
+    }
+
+    def get(self, request):
+        """
+        Return posts, events and volunteers created, updated or deleted after ?since=<cursor>.
+        Start from 0 (or no cursor) and keep passing the returned cursor; while has_more
+        is true, call again right away. ?limit= caps change-log entries per page.
+        """
+        try:
+            since = self.parse_cursor(request.query_params.get('since'))
+            limit = int(request.query_params.get('limit') or settings.SYNC_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "since must be a cursor from this endpoint and limit an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be >= 1."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, settings.SYNC_MAX_PAGE_SIZE)
+
+        entries = list(self.settled_entries(since).values_list('txid', 'id', 'resource', 'object_id', 'action')[:limit + 1])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Only the latest action per object matters
+        latest = {}
+        for _, _, resource, object_id, action in entries:
+            latest[(resource, object_id)] = action
+
+        data = {"cursor": self.format_cursor(entries[-1][:2] if entries else since), "has_more": has_more}
+        for resource, (key, model, serializer_class) in self.SERIALIZERS.items():
+            upserted = [object_id for (res, object_id), action in latest.items() if res == resource and action == ChangeLog.UPSERT]
+            deleted = [object_id for (res, object_id), action in latest.items() if res == resource and action == ChangeLog.DELETE]
+            # Read from the primary as well, so rows a replica hasn't caught up on aren't skipped.
+            # Rows deleted since they were logged simply drop out; their tombstone comes later.
+            queryset = serializer_class.prepare_queryset(
+                model.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=upserted).order_by('pk'), request
+            )
+            data[key] = {
+                "updated": serializer_class(queryset, many=True, context={'request': request}).data,
+                "deleted": deleted,
+            }
+        return Response(data)
+
+    def settled_entries(self, since):
+        """
+        Change-log entries after the cursor that no uncommitted transaction can still precede.
+        Read from the primary: a lagging replica could miss entries the cursor then moves past.
+        """
+        since_txid, since_id = since
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+                horizon = cursor.fetchone()[0]
+            # Every transaction below the horizon has committed or rolled back, so
+            # no entry can appear behind a cursor, however long its transaction ran.
+            # The flip side: any long-running transaction on the primary (including
+            # reconcile_stats while it holds its table lock) stalls sync for every
+            # client until it ends.
+            return (
+                ChangeLog.objects.using(DEFAULT_DB_ALIAS).filter(txid__lt=horizon)
+                .filter(Q(txid__gt=since_txid) | Q(txid=since_txid, id__gt=since_id))
+                .order_by('txid', 'id')
+            )
+        # Without transaction ids, entries wait out the settle window instead
+        settled = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        return ChangeLog.objects.using(DEFAULT_DB_ALIAS).filter(id__gt=since_id, created_at__lte=settled).order_by('id')
+
+    def parse_cursor(self, value):
+        """'<txid>.<id>' (PostgreSQL) or '<id>' -> (txid, id); raises ValueError."""
+        txid, _, object_id = (value or '0').rpartition('.')
+        cursor = (int(txid or 0), int(object_id))
+        if min(cursor) < 0:
+            raise ValueError(value)
+        return cursor
+
+    def format_cursor(self, cursor):
+        txid, object_id = cursor
+        return f"{txid}.{object_id}" if txid else str(object_id)
+
+
+# ------------------ STATS ------------------
+class NeighborhoodStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Dashboard numbers for a postal code (defaults to the user's own), read from
+        the precomputed rollups only: ?postal_code=&period=week|month&limit=<periods>.
+        The series has one entry per period, newest first, with zeros for quiet
+        periods. Top volunteers are summed over the returned periods.
+        """
+        postal_code = request.query_params.get('postal_code')
+        if not postal_code:
+            try:
+                postal_code = get_current_neighbor(request).postal_code
+            except Http404:
+                postal_code = None
+        if not postal_code:
+            return Response({"error": "Provide a postal_code."}, status=status.HTTP_400_BAD_REQUEST)
+
+        period = request.query_params.get('period', NeighborhoodStat.WEEK)
+        if period not in dict(NeighborhoodStat.PERIOD_CHOICES):
+            return Response({"error": "period must be 'week' or 'month'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit') or settings.STATS_DEFAULT_PERIODS)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.STATS_MAX_PERIODS))
+
+        rollups = NeighborhoodStat.objects.filter(postal_code=postal_code, period=period)
+        # A contiguous series up to the current period, or the latest one with future events
+        newest = rollups.order_by('-period_start').values_list('period_start', flat=True).first()
+        starts = stats.recent_period_starts(period, limit, max(filter(None, [timezone.localdate(), newest])))
+        found = {rollup.period_start: rollup for rollup in rollups.filter(period_start__in=starts)}
+        series = [
+            found.get(start) or NeighborhoodStat(postal_code=postal_code, period=period, period_start=start)
+            for start in starts
+        ]
+        top_volunteers = (
+            VolunteerStat.objects.filter(postal_code=postal_code, period=period, period_start__in=starts)
+            .values('volunteer_id', 'volunteer__name')
+            .annotate(signups=models.Sum('signups'))
+            .filter(signups__gt=0)
+            .order_by('-signups')[:10]
+        )
+
+        return Response({
+            "postal_code": postal_code,
+            "period": period,
+            "series": NeighborhoodStatSerializer(series, many=True).data,
+            "top_volunteers": [
+                {"id": row['volunteer_id'], "name": row['volunteer__name'], "signups": row['signups']}
+                for row in top_volunteers
+            ],
+        })
+
+
 # ------------------ USER SIGNUP ------------------
 class SignupUserView(APIView):
     permission_classes = [AllowAny]